@@ -1,5 +1,6 @@
 import asyncio
 import json
+import os
 import sys
 import platform
 from typing import Dict, Any, List
@@ -14,13 +15,21 @@ from src.exchanges.lbank import LBankExchange
 from src.exchanges.mexc import MexcExchange
 from src.exchanges.okx import OkxExchange
 from src.services.find_spread_service import SpreadService
+from src.utils.frame_recorder import FrameRecorder
+from src.utils.profiler import RuntimeProfiler
 
 if platform.system() == 'Windows':
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
 
 async def main():
-    service = SpreadService(min_spread_percent=5)
+    # Prometheus: http://127.0.0.1:9108/metrics; тайминг стадий для каждого 1000-го фрейма
+    # FRAME_CAPTURE_DIR=captures - записывать все сырые фреймы для воспроизведения (replay)
+    # Воспроизведение записи: python -m src.services.replay captures [--speed 1] [--engine matrix]
+    capture_dir = os.environ.get("FRAME_CAPTURE_DIR")
+    frame_recorder = FrameRecorder(capture_dir) if capture_dir else None
+    service = SpreadService(min_spread_percent=5, metrics_port=9108, stage_sample_every=1000,
+                            frame_recorder=frame_recorder)
 
     exchanges = [
         MexcExchange(),
@@ -37,6 +46,12 @@ async def main():
     #service.add_exchange(bingx)
     #service.add_exchange(lbank)
 
+    # Профилирование по запросу: kill -USR1/-USR2 <pid> или
+    # curl -X POST 'http://127.0.0.1:9108/debug/profile?seconds=30' (/debug/memory) - отчёты в reports/
+    profiler = RuntimeProfiler(reports_dir="reports", context_report=service.runtime_report)
+    profiler.install_signal_handlers()
+    profiler.add_routes(service.metrics_server.app)
+
     try:
         await service.start()
 
@@ -44,6 +59,7 @@ async def main():
             await asyncio.sleep(6)
     except KeyboardInterrupt:
         logger.info("Stopping service...")
+        profiler.stop()
         await service.stop()
     except Exception as ex:
         logger.error(f"Error in main: {ex}")
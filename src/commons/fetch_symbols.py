@@ -7,13 +7,19 @@ from typing import Dict, List, Any, Optional, Callable
 from Tools.scripts.nm2def import symbols
 from pycares import symbol
 
+from src.entities.entities_symbols import ContractInfo
 from src.utils.logger import logger
+from src.utils.symbol_registry import SymbolRegistry
 
 
 class ExchangeFetchSymbols:
 
     @staticmethod
     async def fetch_bitget_symbols(product_type: str = "umcbl") -> List[str]:
+        return [contract.symbol for contract in await ExchangeFetchSymbols.fetch_bitget_contracts(product_type)]
+
+    @staticmethod
+    async def fetch_bitget_contracts(product_type: str = "umcbl") -> List[ContractInfo]:
         url = "https://api.bitget.com/api/mix/v1/market/contracts"
         params = {"productType": product_type}
 
@@ -24,16 +30,23 @@ class ExchangeFetchSymbols:
                         data = await response.json()
 
                         if data.get("code") == "00000":
-                            symbols = []
+                            contracts = []
                             for item in data.get("data", []):
                                 base_coin = item.get("baseCoin")
                                 quote_coin = item.get("quoteCoin")
                                 if base_coin and quote_coin:
-                                    symbol = f"{base_coin}_{quote_coin}"
-                                    symbols.append(symbol)
-
-                            logger.info(f"Fetched {len(symbols)} symbols from Bitget")
-                            return symbols
+                                    contracts.append(ContractInfo(
+                                        exchange="bitget",
+                                        symbol=f"{base_coin}_{quote_coin}",
+                                        ws_symbol=f"{base_coin}{quote_coin}".upper(),
+                                        base=base_coin,
+                                        quote=quote_coin,
+                                        # Bitget листит кратные контракты как 1000PEPE
+                                        multiplier=SymbolRegistry.prefix_multiplier(base_coin)
+                                    ))
+
+                            logger.info(f"Fetched {len(contracts)} symbols from Bitget")
+                            return contracts
                         else:
                             logger.error(f"Error in Bitget API response: {data}")
                     else:
@@ -46,6 +59,10 @@ class ExchangeFetchSymbols:
 
     @staticmethod
     async def fetch_lbank_symbols() -> List[str]:
+        return [contract.symbol for contract in await ExchangeFetchSymbols.fetch_lbank_contracts()]
+
+    @staticmethod
+    async def fetch_lbank_contracts() -> List[ContractInfo]:
         url = "https://api.lbkex.com/v2/currencyPairs.do"
 
         try:
@@ -55,13 +72,14 @@ class ExchangeFetchSymbols:
                         data = await response.json()
 
                         if data.get("msg") == "Success":
-                            symbols = []
+                            contracts = []
                             for item in data.get("data", []):
                                 symbol = item.upper()
-                                symbols.append(symbol)
+                                base, quote = SymbolRegistry.split_pair(symbol)
+                                contracts.append(ContractInfo("lbank", symbol, symbol, base, quote))
 
-                            logger.info(f"Fetched {len(symbols)} symbols from LBank")
-                            return symbols
+                            logger.info(f"Fetched {len(contracts)} symbols from LBank")
+                            return contracts
                         else:
                             logger.error(f"Error in Bitget API response: {data}")
                     else:
@@ -74,6 +92,10 @@ class ExchangeFetchSymbols:
 
     @staticmethod
     async def fetch_gate_symbols() -> List[str]:
+        return [contract.symbol for contract in await ExchangeFetchSymbols.fetch_gate_contracts()]
+
+    @staticmethod
+    async def fetch_gate_contracts() -> List[ContractInfo]:
         url = "https://api.gateio.ws/api/v4/futures/usdt/contracts"
         headers = {
             "Accept": "application/json",
@@ -86,13 +108,21 @@ class ExchangeFetchSymbols:
                     if response.status == 200:
                         data = await response.json()
 
-                        symbols = []
+                        contracts = []
                         for item in data:
                             symbol = item.get("name").upper()
-                            symbols.append(symbol)
-
-                        logger.info(f"Fetched {len(symbols)} symbols from Gate")
-                        return symbols
+                            base, quote = SymbolRegistry.split_pair(symbol)
+                            contracts.append(ContractInfo(
+                                exchange="gate",
+                                symbol=symbol,
+                                ws_symbol=symbol,
+                                base=base,
+                                quote=quote,
+                                contract_size=float(item.get("quanto_multiplier") or 1)
+                            ))
+
+                        logger.info(f"Fetched {len(contracts)} symbols from Gate")
+                        return contracts
                     else:
                         logger.error(f"Gate API request failed with status {response.status}")
 
@@ -104,6 +134,10 @@ class ExchangeFetchSymbols:
 
     @staticmethod
     async def fetch_bybit_symbols() -> List[str]:
+        return [contract.symbol for contract in await ExchangeFetchSymbols.fetch_bybit_contracts()]
+
+    @staticmethod
+    async def fetch_bybit_contracts() -> List[ContractInfo]:
         url = "https://api.bybit.com/v5/market/tickers"
         headers = {
             "Accept": "application/json",
@@ -118,14 +152,18 @@ class ExchangeFetchSymbols:
                     # logger.info(f"Response from bybit: {response}")
                     if response.status == 200:
                         json_data = await response.json()
-                        symbols = []
+                        contracts = []
                         for item in json_data.get("result", {}).get("list", []):
                             symbol = item.get("symbol")
                             if symbol:
-                                symbols.append(symbol.upper())
-
-                        logger.info(f"Fetched {len(symbols)} symbols from Bybit")
-                        return symbols
+                                symbol = symbol.upper()
+                                base, quote = SymbolRegistry.split_pair(symbol)
+                                # Bybit листит кратные контракты как 1000PEPEUSDT, 1MBABYDOGEUSDT
+                                contracts.append(ContractInfo("bybit", symbol, symbol, base, quote,
+                                                              multiplier=SymbolRegistry.prefix_multiplier(base)))
+
+                        logger.info(f"Fetched {len(contracts)} symbols from Bybit")
+                        return contracts
                     else:
                         logger.error(f"BingX API request failed with status {response.status}")
 
@@ -136,6 +174,10 @@ class ExchangeFetchSymbols:
 
     @staticmethod
     async def fetch_okx_symbols() -> List[str]:
+        return [contract.symbol for contract in await ExchangeFetchSymbols.fetch_okx_contracts()]
+
+    @staticmethod
+    async def fetch_okx_contracts() -> List[ContractInfo]:
         url = "https://www.okx.com/api/v5/public/mark-price"
         headers = {
             "Accept": "application/json",
@@ -150,15 +192,17 @@ class ExchangeFetchSymbols:
                     # logger.info(f"Response from OKX: {response}")
                     if response.status == 200:
                         json_data = await response.json()
-                        symbols = []
+                        contracts = []
                         for item in json_data.get("data", []):
                             #"instId":"BTC-USDT-SWAP",
                             symbol = item.get("instId")
                             if symbol:
-                                symbols.append(symbol.upper())
+                                symbol = symbol.upper()
+                                base, quote = SymbolRegistry.split_pair(symbol)
+                                contracts.append(ContractInfo("okx", symbol, symbol, base, quote))
 
-                        logger.info(f"Fetched {len(symbols)} symbols from Okx")
-                        return symbols
+                        logger.info(f"Fetched {len(contracts)} symbols from Okx")
+                        return contracts
                     else:
                         logger.error(f"Okx API request failed with status {response.status}")
 
@@ -201,23 +245,27 @@ class ExchangeFetchSymbols:
         return []
 
     @staticmethod
-    async def get_all_symbols_exchange() -> Dict[str, List[str | None]]:
-        """Fetch all symbols from all exchanges"""
-
-        bitget_symbols = await ExchangeFetchSymbols.fetch_bitget_symbols()
-        lbank_symbols = await ExchangeFetchSymbols.fetch_lbank_symbols()
-        gate_symbols = await ExchangeFetchSymbols.fetch_gate_symbols()
-        bybit_symbols = await ExchangeFetchSymbols.fetch_bybit_symbols()
-        okx_symbols = await ExchangeFetchSymbols.fetch_okx_symbols()
-        # bingx_symbols = await ExchangeFetchSymbols.fetch_binx_symbols()
-
+    async def get_all_contracts_exchange() -> Dict[str, List[ContractInfo]]:
+        """Fetch contract metadata from all exchanges"""
 
         return {
-            "bitget": bitget_symbols,
-            "lbank": lbank_symbols,
-            "gate": gate_symbols,
-            "bybit": bybit_symbols,
-            "okx": okx_symbols,
-            "bingx": None,
-            "mexc": None
+            "bitget": await ExchangeFetchSymbols.fetch_bitget_contracts(),
+            "lbank": await ExchangeFetchSymbols.fetch_lbank_contracts(),
+            "gate": await ExchangeFetchSymbols.fetch_gate_contracts(),
+            "bybit": await ExchangeFetchSymbols.fetch_bybit_contracts(),
+            "okx": await ExchangeFetchSymbols.fetch_okx_contracts(),
+            # "bingx": await ExchangeFetchSymbols.fetch_binx_contracts(),
         }
+
+    @staticmethod
+    def symbols_from_contracts(contracts: Dict[str, List[ContractInfo]]) -> Dict[str, List[str | None]]:
+        """Subscription symbols per exchange; None means subscribe to all tickers"""
+        symbols = {exchange: [contract.symbol for contract in items] for exchange, items in contracts.items()}
+        symbols.update({"bingx": None, "mexc": None})
+        return symbols
+
+    @staticmethod
+    async def get_all_symbols_exchange() -> Dict[str, List[str | None]]:
+        """Fetch all symbols from all exchanges"""
+        contracts = await ExchangeFetchSymbols.get_all_contracts_exchange()
+        return ExchangeFetchSymbols.symbols_from_contracts(contracts)
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional
 
 
 @dataclass
@@ -8,9 +9,24 @@ class TokenPrice:
     symbol: str
     price: float
     timestamp: float
+    bid: Optional[float] = None  # Best bid, None if the feed has no book quotes
+    ask: Optional[float] = None  # Best ask, None if the feed has no book quotes
+    received_at: float = 0.0  # Local time the quote was received
+
+    @property
+    def buy_price(self) -> float:
+        """Executable price to buy at: best ask, falling back to the last price"""
+        return self.ask or self.price
+
+    @property
+    def sell_price(self) -> float:
+        """Executable price to sell at: best bid, falling back to the last price"""
+        return self.bid or self.price
 
     def __str__(self):
-        return f"{self.exchange} {self.symbol}: {self.price}"
+        if self.bid is None and self.ask is None:
+            return f"{self.exchange} {self.symbol}: {self.price}"
+        return f"{self.exchange} {self.symbol}: {self.price} (bid {self.bid} / ask {self.ask})"
 
 
 @dataclass
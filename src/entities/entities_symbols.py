@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class ContractInfo:
+    """Contract metadata of an exchange used to build the canonical symbol registry"""
+    exchange: str  # Exchange key as in ExchangeFetchSymbols ("bybit", "gate", ...)
+    symbol: str  # Symbol as used for subscriptions
+    ws_symbol: str  # Symbol as it appears in websocket ticker frames
+    base: str
+    quote: str
+    contract_size: float = 1.0  # Base units per contract (e.g. Gate quanto_multiplier)
+    multiplier: float = 1.0  # Price is quoted for this many base coins (Bybit/Bitget "1000PEPE" contracts)
@@ -0,0 +1,23 @@
+from dataclasses import dataclass, field
+from typing import List
+
+
+@dataclass
+class NetworkStatus:
+    """Deposit/withdrawal availability of a coin on one network"""
+    network: str
+    deposit_enabled: bool
+    withdraw_enabled: bool
+
+
+@dataclass
+class CoinStatus:
+    """Deposit/withdrawal availability of a coin across all its networks"""
+    coin: str
+    deposit_enabled: bool
+    withdraw_enabled: bool
+    networks: List[NetworkStatus] = field(default_factory=list)
+
+    @property
+    def status(self):
+        return self.deposit_enabled, self.withdraw_enabled
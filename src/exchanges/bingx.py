@@ -6,11 +6,18 @@ from typing import Dict, Any, List, Tuple
 
 import websockets
 
+from src.exchanges.ws.subscription_planner import SubscriptionPlanner
 from src.exchanges.ws.websocket import Exchange
+from src.utils import json_codec
 from src.utils.logger import logger
 
 
 class BingXExchange(Exchange):
+    connect_options = {"ping_interval": None, "ping_timeout": None, "close_timeout": 5}  # Пинги шлёт HeartbeatScheduler
+    ping_message = None  # Websocket ping frame: RTT измеряется по pong frame
+    ping_interval = 15
+    max_symbols_per_connection = 200  # BingX: до 200 подписок на соединение
+
     def __init__(self):
         """Implementation for MEXC exchange"""
         super().__init__("BINGX")
@@ -31,38 +38,18 @@ class BingXExchange(Exchange):
         async with self._subscribe_lock:
             self._exchange_symbols = symbols.copy()  # Сохраняем копию списка
 
-    async def connect(self):
-        """Connect to MEXC websocket"""
-        try:
-            self.websocket = await websockets.connect(
-                self.ws_url,
-                ping_interval=15,
-                ping_timeout=10,
-                close_timeout=5
-            )
-            self._running = True
-            logger.info(f"{self.exchange_name} connected to {self.ws_url}")
-            asyncio.create_task(self._keep_alive())
-            asyncio.create_task(self.receive_messages())
-        except Exception as e:
-            logger.error(f"{self.exchange_name} connection error: {e}")
-            raise
+    def _create_subscription_planner(self) -> SubscriptionPlanner:
+        # BingX принимает один dataType на сообщение - только темп отправки
+        return SubscriptionPlanner(self.exchange_name, self._subscription_message,
+                                   max_topics_per_message=1, messages_per_second=10)
 
-    async def subscribe(self, symbols: List[str]):
-        if not symbols:
-            logger.warning(f"No symbols provided for {self.exchange_name}")
-            return
-
-        for symbol in symbols:
-            data_type = f"{symbol}@lastPrice"
-            subscription = {
-                "id": str(uuid.uuid4()),
-                "reqType": "sub",
-                "dataType": data_type
-            }
-            await self.websocket.send(json.dumps(subscription))
-            self.available_pairs.add(symbol)
-        logger.info(f"{self.exchange_name} subscribed to: {symbols}")
+    @staticmethod
+    def _subscription_message(req_id: str, symbols: List[str]) -> Dict[str, Any]:
+        return {
+            "id": str(uuid.uuid4()),
+            "reqType": "sub",
+            "dataType": f"{symbols[0]}@lastPrice"
+        }
 
     async def _process_message(self, data: Dict[str, Any]):
         try:
@@ -72,32 +59,14 @@ class BingXExchange(Exchange):
                 timestamp = int(data.get("E")) / 1000
 
                 if symbol and price:
-                    self.prices[symbol] = price
-                    self.notify_price_update(symbol, price, timestamp)
+                    self.notify_ticker(symbol, price, timestamp)
         except Exception as ex:
+            self._parse_errors_counter.value += 1
             logger.error(f"Bingx error processing message {ex}")
             pass
             # logger.error(f"[BINGX] Message processing failed: {ex}")
-            logger.debug(f"[BINGX] Raw message: {json.dumps(data)}")
+            logger.debug(f"[BINGX] Raw message: {json_codec.dumps(data)}")
 
     @staticmethod
     def get_deposit_withdrawal_status(symbol: str) -> Tuple[Any, Any]:
         return True, True
-
-    async def send_ping(self):
-        if self.websocket:
-            await self.websocket.send(json.dumps({"method": "ping"}))
-
-    async def _reconnect(self):
-        self._running = False  # Остановим receive_messages и keep_alive
-        try:
-            if self.websocket:
-                await self.websocket.close()
-        except Exception as ex:
-            logger.error(f"{self.exchange_name} websocket close error: {ex}")
-
-        await asyncio.sleep(5)
-        logger.info(f"{self.exchange_name} attempting to reconnect...")
-        await self.connect()
-        await asyncio.sleep(4)
-        await self.subscribe(self._exchange_symbols)
@@ -4,12 +4,19 @@ from typing import Dict, Any, List, Tuple
 
 import websockets
 
+from src.exchanges.ws.connection import WebsocketConnection
+from src.exchanges.ws.subscription_planner import SubscriptionPlanner, ACK_BY_TOPIC
 from src.exchanges.ws.websocket import Exchange
-from src.utils.Normalizer import NormalizerSymbolsExchanges
+from src.utils import json_codec
 from src.utils.logger import logger
 
 
 class BitgetExchange(Exchange):
+    data_signatures = ('"channel":"ticker"',)
+    ack_signatures = ('"event":"subscribe"', '"event":"error"')
+
+    max_symbols_per_connection = 50  # Bitget рекомендует до 50 каналов на соединение
+
     def __init__(self):
         """Implementation for LBank exchange"""
         super().__init__("BITGET")
@@ -40,36 +47,29 @@ class BitgetExchange(Exchange):
             logger.error(f"Bitget price verification failed: {e}")
             return 0.0
 
-    async def connect(self):
-        """Connect to MEXC websocket"""
-        try:
-            self.websocket = await websockets.connect(self.ws_url)
-            self._running = True
-            logger.info(f"{self.exchange_name} connected to {self.ws_url}")
-            asyncio.create_task(self._keep_alive())
-            asyncio.create_task(self.receive_messages())
-        except Exception as e:
-            logger.error(f"{self.exchange_name} connection error: {e}")
-            raise
-
-    async def subscribe(self, symbols: List[str]):
-        """Subscribe to market data for the given symbols"""
-        for symbol in symbols:
-            formatted_symbol = symbol.upper().replace("_", "")
-            self.available_pairs.add(formatted_symbol)
-            subscription = {
-                "op": "subscribe",
-                "args": [
-                    {
-                        "instType": "USDT-FUTURES",
-                        "channel": "ticker",
-                        "instId": formatted_symbol
-                    }
-                ]
-            }
-
-            await self.websocket.send(json.dumps(subscription))
-            # logger.info(f"{self.exchange_name} subscribed to {formatted_symbol}")
+    def _create_subscription_planner(self) -> SubscriptionPlanner:
+        # Лимиты Bitget: 10 сообщений в секунду на соединение, запрос не больше 4096 байт
+        return SubscriptionPlanner(self.exchange_name, self._subscription_message,
+                                   max_topics_per_message=40, messages_per_second=10, ack_mode=ACK_BY_TOPIC)
+
+    def format_symbol(self, symbol: str) -> str:
+        return symbol.upper().replace("_", "")
+
+    @staticmethod
+    def _subscription_message(req_id: str, symbols: List[str]) -> Dict[str, Any]:
+        return {
+            "op": "subscribe",
+            "args": [{"instType": "USDT-FUTURES", "channel": "ticker", "instId": symbol} for symbol in symbols]
+        }
+
+    def _process_ack(self, data: Dict[str, Any], connection: WebsocketConnection):
+        # Bitget подтверждает каждый arg отдельно, id запроса не возвращает
+        success = data.get("event") == "subscribe"
+        instrument = data.get("arg", {}).get("instId")
+        if instrument is None:
+            logger.error(f"{self.exchange_name} subscription error {data.get('code')}: {data.get('msg')}")
+            return
+        connection.subscription_planner.ack_topic(instrument, success, data.get("msg"))
 
     async def _process_message(self, data: Dict[str, Any]):
         """Process incoming MEXC websocket messages"""
@@ -90,20 +90,22 @@ class BitgetExchange(Exchange):
             for ticker in data.get("data", []):
                 try:
                     symbol = ticker.get("instId", "").upper()
-                    formatted_symbol = await NormalizerSymbolsExchanges.normalize_symbol('bitget', symbol)
                     price = float(ticker.get("lastPr", 0))
+                    bid = self.parse_price(ticker.get("bidPr"))
+                    ask = self.parse_price(ticker.get("askPr"))
                     timestamp = int(ticker.get("ts", 0)) / 1000
 
-                    if formatted_symbol and price:
-                        self.prices[formatted_symbol] = price
+                    if symbol and price:
                         # logger.warning(f"BITGET Price update: {symbol} - {price}")
-                        self.notify_price_update(formatted_symbol, price, timestamp)
+                        self.notify_ticker(symbol, price, timestamp, bid, ask)
 
                 except (ValueError, TypeError) as e:
+                    self._parse_errors_counter.value += 1
                     logger.error(f"Error processing ticker {ticker.get('symbol')}: {e}")
 
             return
         except Exception as ex:
+            self._parse_errors_counter.value += 1
             logger.error(f"Bitget process message error {ex}")
             # Todo: Тут ошибка позже надо разобраться и доделать
             #  "2025-04-22 20:14:58.889 | ERROR    | src.exchanges.bitget:_process_message:81 - [BITGET] Message processing failed: ('MEXC', 'DYDXUSDT')
@@ -111,26 +113,8 @@ class BitgetExchange(Exchange):
             #
             pass
             # logger.error(f"[BITGET] Message processing failed: {ex}")
-            logger.debug(f"[BITGET] Raw message that failed: {json.dumps(data)}")
+            logger.debug(f"[BITGET] Raw message that failed: {json_codec.dumps(data)}")
 
     @staticmethod
     def get_deposit_withdrawal_status(symbol: str) -> Tuple[Any, Any]:
         return True, True
-
-    async def send_ping(self):
-        if self.websocket:
-            await self.websocket.send("ping")
-
-    async def _reconnect(self):
-        self._running = False  # Остановим receive_messages и keep_alive
-        try:
-            if self.websocket:
-                await self.websocket.close()
-        except Exception as ex:
-            logger.error(f"{self.exchange_name} websocket close error: {ex}")
-
-        await asyncio.sleep(5)
-        logger.info(f"{self.exchange_name} attempting to reconnect...")
-        await self.connect()
-        await asyncio.sleep(4)
-        await self.subscribe(self._exchange_symbols)
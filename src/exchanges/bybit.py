@@ -1,23 +1,34 @@
 import asyncio
 import json
 import time
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Tuple, Optional
 
 import websockets
 from pybit.unified_trading import WebSocket
 
+from src.exchanges.ws.connection import WebsocketConnection
+from src.exchanges.ws.subscription_planner import SubscriptionPlanner, ACK_BY_REQUEST
 from src.exchanges.ws.websocket import Exchange
-from src.utils.Normalizer import NormalizerSymbolsExchanges
+from src.utils import json_codec
 from src.utils.logger import logger
 
 
 class BybitExchange(Exchange):
+    pong_signatures = ('"ret_msg":"pong"',)
+    control_signatures = ('"success":true',)  # Прочие успешные ответы на op-запросы
+    data_signatures = ('"topic":"tickers.',)
+    ack_signatures = ('"op":"subscribe"',)
+
+    ping_message = json.dumps({"op": "ping"})
+    max_symbols_per_connection = 200  # Linear: запрос подписки не длиннее 21000 символов
+
     def __init__(self):
         """Implementation for Bybit exchange"""
         super().__init__("BYBIT")
         self.ws_url = "wss://stream.bybit.com/v5/public/linear"
         self.rest_url = "https://api.bybit.com/v5/market/tickers"
         self.ws_client = None
+        self._ticker_state: Dict[str, Dict[str, Any]] = {}  # symbol -> последний полный тикер (snapshot + delta)
 
         self._exchange_symbols: List[str] = []
         self._subscribe_lock = asyncio.Lock()
@@ -42,83 +53,55 @@ class BybitExchange(Exchange):
             logger.error(f"Bybit price fetch error: {e}")
             return 0.0
 
-    async def connect(self):
-        """Connect to BYBIT websocket"""
-        try:
-            self.websocket = await websockets.connect(self.ws_url)
-            self._running = True
-            logger.info(f"{self.exchange_name} connected to {self.ws_url}")
-            asyncio.create_task(self._keep_alive())
-            asyncio.create_task(self.receive_messages())
-        except Exception as e:
-            logger.error(f"{self.exchange_name} connection error: {e}")
-            raise
-
-    async def subscribe(self, symbols: List[str]):
-        """Subscribe to market data for the given symbols"""
-        if not symbols:
-            logger.warning(f"No symbols provided for {self.exchange_name}")
-            return
-
-        for symbol in symbols:
-            topic = f"tickers.{symbol}"
+    def _create_subscription_planner(self) -> SubscriptionPlanner:
+        # Linear: без лимита на число args, весь шард уходит одним сообщением
+        return SubscriptionPlanner(self.exchange_name, self._subscription_message,
+                                   max_topics_per_message=200, messages_per_second=10, ack_mode=ACK_BY_REQUEST)
 
-            subscription = {
-                "op": "subscribe",
-                "args": [topic]
-            }
-
-            try:
-                await self.websocket.send(json.dumps(subscription))
-                self.available_pairs.add(symbol)
-                # logger.debug(f"Subscribed to {symbol} tickers")
-            except Exception as e:
-                logger.error(f"Failed to subscribe to {symbol}: {e}")
+    @staticmethod
+    def _subscription_message(req_id: str, symbols: List[str]) -> Dict[str, Any]:
+        return {
+            "req_id": req_id,
+            "op": "subscribe",
+            "args": [f"tickers.{symbol}" for symbol in symbols]
+        }
 
-        logger.info(f"{self.exchange_name} subscribed to {len(symbols)} tickers")
+    def _process_ack(self, data: Dict[str, Any], connection: WebsocketConnection):
+        connection.subscription_planner.ack_request(data.get("req_id"), data.get("success", False), data.get("ret_msg"))
 
     async def _process_message(self, data: Dict[str, Any]):
         """Process incoming MEXC websocket messages"""
         try:
             if data.get("topic", "").startswith("tickers."):
-                data = data.get("data", {})
-                symbol = data.get("symbol", "").upper()
-                price = float(data.get("lastPrice", 0))
-                timestamp = int(time.time() * 1000) / 1000  # Bybit doesn't provide timestamp in messag
+                ticker = data.get("data", {})
+                symbol = ticker.get("symbol", "").upper()
+
+                # Bybit шлёт snapshot, а затем delta только с изменившимися полями - сливаем в кеш
+                if data.get("type") == "snapshot" or symbol not in self._ticker_state:
+                    state = self._ticker_state[symbol] = dict(ticker)
+                else:
+                    state = self._ticker_state[symbol]
+                    state.update(ticker)
 
-                formatted_symbol = await NormalizerSymbolsExchanges.normalize_symbol('bybit', symbol)
+                price = float(state.get("lastPrice", 0))
+                bid = self.parse_price(state.get("bid1Price"))
+                ask = self.parse_price(state.get("ask1Price"))
+                ts = data.get("ts")  # Время генерации сообщения на стороне Bybit, мс
+                timestamp = ts / 1000 if ts else time.time()
 
-                if formatted_symbol and price:
-                    self.prices[formatted_symbol] = price
-                    self.notify_price_update(formatted_symbol, price, timestamp)
+                if symbol and price:
+                    self.notify_ticker(symbol, price, timestamp, bid, ask)
 
         except Exception as e:
+            self._parse_errors_counter.value += 1
             logger.error(f"{self.exchange_name} error processing message: {e}")
-            logger.debug(f"[Bybit] Raw message: {json.dumps(data)}")
+            logger.debug(f"[Bybit] Raw message: {json_codec.dumps(data)}")
 
     @staticmethod
-    def get_deposit_withdrawal_status(symbol: str) -> Tuple[Any, Any]:
+    def get_deposit_withdrawal_status(symbol: str) -> Optional[Tuple[bool, bool]]:
         """Get deposit and withdrawal status for a symbol"""
         try:
             return True, True
         except Exception as e:
             logger.error(f"Bybit deposit/withdrawal status fetch error: {e}")
-            return False, False
-
-    async def send_ping(self):
-        if self.websocket:
-            await self.websocket.send(json.dumps({"op": "ping"}))
-
-    async def _reconnect(self):
-        self._running = False  # Остановим receive_messages и keep_alive
-        try:
-            if self.websocket:
-                await self.websocket.close()
-        except Exception as ex:
-            logger.error(f"{self.exchange_name} websocket close error: {ex}")
-
-        await asyncio.sleep(5)
-        logger.info(f"{self.exchange_name} attempting to reconnect...")
-        await self.connect()
-        await asyncio.sleep(4)
-        await self.subscribe(self._exchange_symbols)
+            return None
@@ -1,18 +1,32 @@
 import asyncio
 import json
 import time
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Tuple, Optional, Set
 
-import requests
 import websockets
 from aiohttp import ClientSession
 
+from src.entities.entities_wallet import CoinStatus, NetworkStatus
+from src.exchanges.ws.connection import WebsocketConnection
+from src.exchanges.ws.subscription_planner import SubscriptionPlanner, ACK_BY_REQUEST
 from src.exchanges.ws.websocket import Exchange
 from src.utils.Normalizer import NormalizerSymbolsExchanges
+from src.utils import json_codec
 from src.utils.logger import logger
+from src.utils.rate_limiter import RateLimiter
 
 
 class GateExchange(Exchange):
+    pong_signatures = ('"channel":"futures.pong"',)
+    data_signatures = ('"channel":"futures.tickers"',)
+    ack_signatures = ('"event":"subscribe"',)
+    # Ack начинается с time, time_ms, conn_id, trace_id, channel - "event" стоит около 146-го символа
+    frame_head_size = 256
+
+    connect_options = {"ping_interval": None, "ping_timeout": None}  # Отключаем авто-ping, используем свой
+    ping_interval = 20
+    max_symbols_per_connection = 200
+
     def __init__(self):
         """Implementation for MEXC exchange"""
         super().__init__("GATE")
@@ -22,6 +36,20 @@ class GateExchange(Exchange):
         self._exchange_symbols: List[str] = []
         self._subscribe_lock = asyncio.Lock()
 
+        # Кеш /wallet/currency_chains: currency -> (CoinStatus, время загрузки)
+        self.currency_chains_url = "https://api.gateio.ws/api/v4/wallet/currency_chains"
+        self.currency_status_refresh_interval = 300
+        self.currency_status_concurrency = 8
+        self._currency_status: Dict[str, Tuple[CoinStatus, float]] = {}
+        self._currency_status_limiter = RateLimiter(rate=20)  # Лимит Gate: 200 запросов за 10 секунд
+        self._currency_refresh_lock = asyncio.Lock()
+        self._warmup_tasks: Set[asyncio.Task] = set()  # Фоновый прогрев статусов; отменяется в close()
+
+    @property
+    def ping_message(self) -> str:
+        # Gate отвечает futures.pong только на futures.ping с текущим временем
+        return json.dumps({"time": int(time.time()), "channel": "futures.ping"})
+
     @property
     async def exchange_symbols(self) -> List[str]:
         """Получение списка символов (асинхронное свойство)"""
@@ -32,6 +60,24 @@ class GateExchange(Exchange):
         async with self._subscribe_lock:
             self._exchange_symbols = symbols.copy()  # Сохраняем копию списка
 
+        # Прогреваем статусы депозита/withdrawal в фоне для всех базовых монет
+        task = asyncio.create_task(self.refresh_deposit_withdrawal_snapshot())
+        self._warmup_tasks.add(task)
+        task.add_done_callback(self._warmup_done)
+
+    def _warmup_done(self, task: asyncio.Task):
+        self._warmup_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"GATE deposit/withdrawal warm-up error: {task.exception()}")
+
+    async def close(self):
+        """Cancel the status warm-up, then close the connections"""
+        tasks = list(self._warmup_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await super().close()
+
     async def get_last_price(self, symbol: str) -> float:
         try:
             params = {"contract": symbol}
@@ -42,38 +88,24 @@ class GateExchange(Exchange):
             logger.error(f"Gate.io price fetch error: {e}")
             return 0.0
 
-    async def connect(self):
-        """Connect to MEXC websocket"""
-        try:
-            self.websocket = await websockets.connect(
-                self.ws_url,
-                ping_interval=None,  # Отключаем авто-ping, используем свой
-                ping_timeout=None,
-            )
-            self._running = True
-            logger.info(f"{self.exchange_name} connected to {self.ws_url}")
-            asyncio.create_task(self._keep_alive())
-            asyncio.create_task(self.receive_messages())
-        except Exception as e:
-            logger.error(f"{self.exchange_name} connection error: {e}")
-            raise
-
-    async def subscribe(self, symbols: List[str]):
-        """Subscribe to market data for the given symbols"""
-        if not symbols:
-            logger.warning(f"No symbols provided for {self.exchange_name}")
-            return
+    def _create_subscription_planner(self) -> SubscriptionPlanner:
+        # Gate принимает список контрактов в payload одного сообщения
+        return SubscriptionPlanner(self.exchange_name, self._subscription_message,
+                                   max_topics_per_message=200, messages_per_second=10, ack_mode=ACK_BY_REQUEST)
 
-        for symbol in symbols:
-            subscription = {
-                "time": int(time.time()),
-                "channel": "futures.tickers",
-                "event": "subscribe",
-                "payload": symbols
-            }
-            await self.websocket.send(json.dumps(subscription))
-            self.available_pairs.add(symbol)
-        logger.info(f"{self.exchange_name} subscribed to all tickers")
+    @staticmethod
+    def _subscription_message(req_id: str, symbols: List[str]) -> Dict[str, Any]:
+        return {
+            "time": int(time.time()),
+            "id": int(req_id),
+            "channel": "futures.tickers",
+            "event": "subscribe",
+            "payload": symbols
+        }
+
+    def _process_ack(self, data: Dict[str, Any], connection: WebsocketConnection):
+        error = data.get("error")
+        connection.subscription_planner.ack_request(data.get("id"), error is None, error and error.get("message"))
 
     async def _process_message(self, data: Dict[str, Any]):
         """Process incoming MEXC websocket messages"""
@@ -82,86 +114,109 @@ class GateExchange(Exchange):
                 for ticker in data.get("result", []):
                     try:
                         symbol = ticker.get("contract", "").upper()
-                        formatted_symbol = await NormalizerSymbolsExchanges.normalize_symbol('gate', symbol)
                         price = float(ticker.get("last", 0))
+                        bid = self.parse_price(ticker.get("highest_bid"))
+                        ask = self.parse_price(ticker.get("lowest_ask"))
                         timestamp = data.get("time_ms", 0) / 1000
 
-                        if formatted_symbol and price:
-                            self.prices[formatted_symbol] = price
-                            self.notify_price_update(formatted_symbol, price, timestamp)
+                        if symbol and price:
+                            self.notify_ticker(symbol, price, timestamp, bid, ask)
                     except (ValueError, TypeError) as e:
+                        self._parse_errors_counter.value += 1
                         logger.error(f"Ошибка обработки тикера {ticker.get('contract')}: {e}")
         except Exception as ex:
+            self._parse_errors_counter.value += 1
             logger.error(f"Gate process message error {ex}")
             pass
 
             # logger.error(f"[MEXC] Message processing failed: {ex}")
-            logger.debug(f"[GATE] Raw message that failed: {json.dumps(data)}")
+            logger.debug(f"[GATE] Raw message that failed: {json_codec.dumps(data)}")
 
-    @staticmethod
-    def get_deposit_withdrawal_status(symbol: str) -> Tuple[bool, bool]:
+    def get_deposit_withdrawal_status(self, symbol: str) -> Optional[Tuple[bool, bool]]:
         """
-        Синхронная проверка статуса депозитов и withdrawals для Gate.io
-        :param symbol: Символ криптовалюты (например "BTC")
-        :return: (deposit_available: bool, withdrawal_available: bool)
+        Статус депозитов и withdrawals для Gate.io из кеша /wallet/currency_chains (без запросов к API)
+        :param symbol: Символ (например "BTCUSDT")
+        :return: (deposit_available: bool, withdrawal_available: bool); None - статус ещё не загружен
         """
-        try:
-            symbol_without_usdt = NormalizerSymbolsExchanges.normalize_without_usdt_symbol(symbol)
-            url = "https://api.gateio.ws/api/v4/wallet/currency_chains"
-            params = {'currency': symbol_without_usdt}
+        cached = self._currency_status.get(NormalizerSymbolsExchanges.normalize_without_usdt_symbol(symbol))
+        if cached is None:
+            return None
+        return cached[0].status
+
+    async def fetch_deposit_withdrawal_status(self, symbol: str) -> Optional[Tuple[bool, bool]]:
+        currency = NormalizerSymbolsExchanges.normalize_without_usdt_symbol(symbol)
+        cached = self._currency_status.get(currency)
+        if cached is None or time.time() - cached[1] >= self.currency_status_refresh_interval:
+            await self._refresh_currency_status(currency)
+        return self.get_deposit_withdrawal_status(symbol)
+
+    async def refresh_deposit_withdrawal_snapshot(self):
+        """Прогреть/обновить статусы всех базовых монет подписанных фьючерсов"""
+        if self._currency_refresh_lock.locked():
+            return  # Прогрев уже идёт
+
+        async with self._currency_refresh_lock:
+            await self._refresh_stale_currencies()
+
+    async def _refresh_stale_currencies(self):
+        now = time.time()
+        currencies = {symbol.split("_")[0].upper() for symbol in self._exchange_symbols if symbol}
+        stale = [
+            currency for currency in currencies
+            if now - self._currency_status.get(currency, (None, 0.0))[1] >= self.currency_status_refresh_interval
+        ]
+        if not stale:
+            return
+
+        semaphore = asyncio.Semaphore(self.currency_status_concurrency)
+
+        async def refresh(currency: str):
+            async with semaphore:
+                await self._refresh_currency_status(currency)
+
+        await asyncio.gather(*(refresh(currency) for currency in stale))
+        logger.info(f"{self.exchange_name} currency chain status refreshed for {len(stale)} currencies")
 
+    async def _refresh_currency_status(self, currency: str):
+        """Загрузить /wallet/currency_chains для одной монеты через общий aiohttp session"""
+        try:
+            await self._currency_status_limiter.wait()
+            params = {'currency': currency}
             headers = {
                 'Accept': 'application/json',
                 'Content-Type': 'application/json'
             }
 
-            response = requests.get(url, headers=headers, params=params)
-
-            if response.status_code != 200:
-                logger.error(f"Gate.io API error: HTTP {response.status_code}")
-                logger.error(f"Response: {response.text} |{response.url}")
-                return False, False
-
-            data = response.json()
-            deposit_open = False
-            withdrawal_open = False
-
-            for chain in data:
-                # Проверяем статус для каждой цепи
-                if chain.get('is_deposit_disabled', 1) == 0:
-                    deposit_open = True
-                if chain.get('is_withdraw_disabled', 1) == 0:
-                    withdrawal_open = True
-
-                # Прерываем цикл если оба статуса найдены
-                if deposit_open and withdrawal_open:
-                    break
-
-            return deposit_open, withdrawal_open
+            async with self.session.get(self.currency_chains_url, headers=headers, params=params) as response:
+                if response.status == 429:
+                    logger.warning("Gate.io currency_chains rate limited, backing off")
+                    self._currency_status_limiter.pause(5)
+                    return
+                if response.status != 200:
+                    logger.error(f"Gate.io API error: HTTP {response.status} | {response.url}")
+                    return
+                data = await response.json()
+
+            networks = [
+                NetworkStatus(
+                    network=chain.get('chain', ''),
+                    # Gate отдаёт 0 когда депозит/withdrawal открыт
+                    deposit_enabled=chain.get('is_deposit_disabled', 1) == 0,
+                    withdraw_enabled=chain.get('is_withdraw_disabled', 1) == 0
+                )
+                for chain in data
+            ]
+            coin_status = CoinStatus(
+                coin=currency,
+                deposit_enabled=any(net.deposit_enabled for net in networks),
+                withdraw_enabled=any(net.withdraw_enabled for net in networks),
+                networks=networks
+            )
+            self._currency_status[currency] = (coin_status, time.time())
 
         except Exception as ex:
-            logger.error(f"Gate deposit/withdrawal status error: {ex}")
-            return False, False
-
-    async def send_ping(self):
-        await asyncio.sleep(10)
-        if self.websocket:
-            await self.websocket.send(json.dumps({"method": "ping"}))
+            logger.error(f"Gate deposit/withdrawal status error for {currency}: {ex}")
 
     async def check_volume(self):
         """Check volume for the given symbols"""
         pass
-
-    async def _reconnect(self):
-        self._running = False  # Остановим receive_messages и keep_alive
-        try:
-            if self.websocket:
-                await self.websocket.close()
-        except Exception as ex:
-            logger.error(f"{self.exchange_name} websocket close error: {ex}")
-
-        await asyncio.sleep(5)
-        logger.info(f"{self.exchange_name} attempting to reconnect...")
-        await self.connect()
-        await asyncio.sleep(4)
-        await self.subscribe(self._exchange_symbols)
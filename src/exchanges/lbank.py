@@ -1,15 +1,22 @@
 import asyncio
 import json
 import time
-from typing import Dict, Any, List, Tuple
+import uuid
+from typing import Dict, Any, List, Tuple, Optional
 
 import websockets
 
+from src.exchanges.ws.subscription_planner import SubscriptionPlanner
 from src.exchanges.ws.websocket import Exchange
+from src.utils import json_codec
 from src.utils.logger import logger
 
 
 class LBankExchange(Exchange):
+    pong_signatures = ('"action":"pong"',)
+
+    connect_options = {"ping_interval": None, "ping_timeout": None}  # Отключаем авто-ping, используем свой
+
     def __init__(self):
         """Implementation for LBANK exchange"""
         super().__init__("LBANK")
@@ -19,6 +26,11 @@ class LBankExchange(Exchange):
         self._exchange_symbols: List[str] = []
         self._subscribe_lock = asyncio.Lock()
 
+    @property
+    def ping_message(self) -> str:
+        # LBank отвечает pong только на ping с идентификатором
+        return json.dumps({"action": "ping", "ping": str(uuid.uuid4())})
+
     @property
     async def exchange_symbols(self) -> List[str]:
         """Получение списка символов (асинхронное свойство)"""
@@ -29,42 +41,22 @@ class LBankExchange(Exchange):
         async with self._subscribe_lock:
             self._exchange_symbols = symbols.copy()  # Сохраняем копию списка
 
-    async def connect(self):
-        """Connect to LBANK websocket"""
-        try:
-            self.websocket = await websockets.connect(
-                self.ws_url,
-                ping_interval=None,  # Отключаем авто-ping, используем свой
-                ping_timeout=None,
-            )
-            self._running = True
-            logger.info(f"{self.exchange_name} connected to {self.ws_url}")
-            asyncio.create_task(self._keep_alive())
-            asyncio.create_task(self.receive_messages())
-        except Exception as e:
-            logger.error(f"{self.exchange_name} connection error: {e}")
-            raise
-
-    async def subscribe(self, symbols: List[str]):
-        """Subscribe to market data for the given symbols"""
-        if not symbols:
-            logger.warning(f"No symbols provided for {self.exchange_name}")
-            return
-
-        for symbol in symbols:
-            try:
-                # LBANK использует формат "BTC_USDT"
-                formatted_symbol = symbol.replace("-", "_").upper()
-                subscription = {
-                    "action": "subscribe",
-                    "subscribe": "tick",
-                    "pair": formatted_symbol
-                }
-                await self.websocket.send(json.dumps(subscription))
-                self.available_pairs.add(formatted_symbol)
-                # logger.info(f"{self.exchange_name} subscribed to {formatted_symbol}")
-            except Exception as e:
-                logger.error(f"Subscription error for {symbol}: {e}")
+    def _create_subscription_planner(self) -> SubscriptionPlanner:
+        # LBank принимает одну пару на сообщение - только темп отправки
+        return SubscriptionPlanner(self.exchange_name, self._subscription_message,
+                                   max_topics_per_message=1, messages_per_second=10)
+
+    def format_symbol(self, symbol: str) -> str:
+        # LBANK использует формат "BTC_USDT"
+        return symbol.replace("-", "_").upper()
+
+    @staticmethod
+    def _subscription_message(req_id: str, symbols: List[str]) -> Dict[str, Any]:
+        return {
+            "action": "subscribe",
+            "subscribe": "tick",
+            "pair": symbols[0]
+        }
 
     async def _process_message(self, data: Dict[str, Any]):
         """Process incoming LBANK websocket messages"""
@@ -76,18 +68,18 @@ class LBankExchange(Exchange):
             # Обработка тиков
             if data.get("type") == "tick":
                 tick_data = data.get("tick", {})
-                symbol = data.get("pair", "").replace("_", "").upper()  # BTC_USDT -> BTC
+                symbol = data.get("pair", "").upper()  # btc_usdt -> BTC_USDT
                 price = float(tick_data.get("latest", 0))
                 timestamp = self._parse_lbank_time(data.get("TS"))
 
                 if symbol and price:
-                    self.prices[symbol] = price
-                    self.notify_price_update(symbol, price, timestamp)
+                    self.notify_ticker(symbol, price, timestamp)
 
         except Exception as ex:
             pass
+            self._parse_errors_counter.value += 1
             logger.error(f"[LBANK] Message processing failed: {ex}")
-            logger.debug(f"[LBANK] Raw message: {json.dumps(data)}")
+            logger.debug(f"[LBANK] Raw message: {json_codec.dumps(data)}")
 
     def _parse_lbank_time(self, time_str: str) -> float:
         """Convert LBANK time format to timestamp"""
@@ -99,27 +91,8 @@ class LBankExchange(Exchange):
             return time.time()
 
     @staticmethod
-    def get_deposit_withdrawal_status(symbol: str) -> Tuple[Any, Any]:
-        pass
-
-    async def send_ping(self):
-        """Send ping to LBANK"""
-        if self.websocket:
-            await self.websocket.send(json.dumps({"action": "ping"}))
-
-    async def _reconnect(self):
-        self._running = False  # Остановим receive_messages и keep_alive
-        try:
-            if self.websocket:
-                await self.websocket.close()
-        except Exception as ex:
-            logger.error(f"{self.exchange_name} websocket close error: {ex}")
-
-        await asyncio.sleep(5)
-        logger.info(f"{self.exchange_name} attempting to reconnect...")
-        await self.connect()
-        await asyncio.sleep(4)
-        await self.subscribe(self._exchange_symbols)
+    def get_deposit_withdrawal_status(symbol: str) -> Optional[Tuple[bool, bool]]:
+        return None  # Статусы LBank не загружаются
 
     # async def _keep_alive(self):
     #     """Keep connection alive"""
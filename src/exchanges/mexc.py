@@ -4,14 +4,18 @@ import hmac
 import json
 import os
 import time
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Tuple, Optional, Set
 
-import requests
+import aiohttp
 import websockets
 from dotenv import load_dotenv
 
+from src.entities.entities_wallet import CoinStatus, NetworkStatus
+from src.exchanges.ws.connection import WebsocketConnection
+from src.exchanges.ws.subscription_planner import SubscriptionPlanner
 from src.exchanges.ws.websocket import Exchange
 from src.utils.Normalizer import NormalizerSymbolsExchanges
+from src.utils import json_codec
 from src.utils.logger import logger
 
 load_dotenv()
@@ -23,6 +27,25 @@ class MexcApiConfig:
 
 
 class MexcExchange(Exchange, MexcApiConfig):
+    pong_signatures = ('"channel":"pong"',)
+    control_signatures = ('"channel":"rs.sub.',)
+    data_signatures = ('"channel":"push.tickers"',)
+
+    connect_options = {"ping_interval": None, "ping_timeout": None}  # Отключаем авто-ping, используем свой
+    ping_message = json.dumps({"method": "ping"})
+
+    # Множество спотовых символов MEXC, общее для всех экземпляров (check_token_exists вызывается без экземпляра)
+    spot_ticker_url = "https://api.mexc.com/api/v3/ticker/price"
+    spot_symbols_refresh_interval = 600
+    spot_symbols_min_refresh_gap = 30
+    spot_symbols_negative_ttl = 300
+    _spot_symbols: Set[str] = set()
+    _spot_symbols_updated_at = 0.0
+    _spot_symbols_attempted_at = 0.0
+    _spot_symbols_missing: Dict[str, float] = {}  # symbol -> когда истекает негативная запись
+    _spot_symbols_pruned_at = 0.0
+    _spot_symbols_task: Optional[asyncio.Task] = None
+
     def __init__(self):
         """Implementation for MEXC exchange"""
         super().__init__("MEXC")
@@ -31,6 +54,24 @@ class MexcExchange(Exchange, MexcApiConfig):
         self._exchange_symbols: List[str] = []  # Приватный атрибут для хранения символов
         self._subscribe_lock = asyncio.Lock()  # Блокировка для безопасного доступа
 
+        # Снапшот /capital/config/getall: coin -> статус депозита/withdrawal по сетям
+        self.capital_config_url = "https://api.mexc.com/api/v3/capital/config/getall"
+        self.capital_config_refresh_interval = 300
+        self._capital_config: Dict[str, CoinStatus] = {}
+        self._capital_config_updated_at = 0.0
+        self._capital_config_attempted_at = 0.0
+        self.capital_config_retry_interval = 30
+        self._capital_config_lock = asyncio.Lock()
+
+        # Ключи подписанного /capital/config проверяются один раз: без них снапшот не загружается,
+        # статусы MEXC остаются UNKNOWN
+        self._api_key = os.getenv("MEXC_API_KEY")
+        self._api_secret = os.getenv("MEXC_SECRET_KEY")
+        self.capital_config_enabled = bool(self._api_key and self._api_secret)
+        if not self.capital_config_enabled:
+            logger.warning("MEXC API credentials not configured (MEXC_API_KEY, MEXC_SECRET_KEY): "
+                           "deposit/withdrawal statuses stay UNKNOWN")
+
         API_KEY = os.getenv("MEXC_API_KEY")
         API_SECRET = os.getenv("MEXC_API_SECRET")
 
@@ -56,43 +97,29 @@ class MexcExchange(Exchange, MexcApiConfig):
             logger.error(f"MEXC price fetch error: {e}")
             return 0.0
 
-    async def connect(self):
-        """Connect to MEXC websocket"""
-        try:
-            self.websocket = await websockets.connect(
-                self.ws_url,
-                ping_interval=None,  # Отключаем авто-ping, используем свой
-                ping_timeout=None,
-            )
-            self._running = True
-            logger.info(f"{self.exchange_name} connected to {self.ws_url}")
-            asyncio.create_task(self._keep_alive())
-            asyncio.create_task(self.receive_messages())
-        except Exception as e:
-            logger.error(f"{self.exchange_name} connection error: {e}")
-            raise
+    def _create_subscription_planner(self) -> SubscriptionPlanner:
+        return SubscriptionPlanner(self.exchange_name, self._subscription_message,
+                                   max_topics_per_message=1, messages_per_second=10)
 
-    async def subscribe(self, symbols: List[str]):
-        """Subscribe to market data for the given symbols"""
-        if symbols is None:
-            subscription = {
-                "method": "sub.tickers",
-                "param": {}
+    def format_symbol(self, symbol: str) -> str:
+        return symbol.upper()
+
+    @staticmethod
+    def _subscription_message(req_id: str, symbols: List[str]) -> Dict[str, Any]:
+        return {
+            "method": "sub.tickers",
+            "param": {
+                "symbol": symbols[0]
             }
-            await self.websocket.send(json.dumps(subscription))
-            logger.info(f"{self.exchange_name} subscribed to all tickers")
-        else:
-            for symbol in symbols:
-                formatted_symbol = symbol.upper()
-                self.available_pairs.add(formatted_symbol)
-                subscription = {
-                    "method": "sub.tickers",
-                    "param": {
-                        "symbol": formatted_symbol
-                    }
-                }
-                await self.websocket.send(json.dumps(subscription))
-                logger.info(f"{self.exchange_name} subscribed to {formatted_symbol}")
+        }
+
+    async def _subscribe_all(self, connection: WebsocketConnection):
+        subscription = {
+            "method": "sub.tickers",
+            "param": {}
+        }
+        await connection.websocket.send(json.dumps(subscription))
+        logger.info(f"{connection.name} subscribed to all tickers")
 
     async def _process_message(self, data: Dict[str, Any]):
         """Process incoming MEXC websocket messages"""
@@ -112,39 +139,62 @@ class MexcExchange(Exchange, MexcApiConfig):
             for ticker in data.get("data", []):
                 try:
                     symbol = ticker.get("symbol", "").upper()
-                    formatted_symbol = await NormalizerSymbolsExchanges.normalize_symbol('mexc', symbol)
                     price = float(ticker.get("lastPrice", 0))
+                    bid = self.parse_price(ticker.get("bid1"))
+                    ask = self.parse_price(ticker.get("ask1"))
 
-                    if formatted_symbol and price:
-                        self.prices[formatted_symbol] = price
+                    if symbol and price:
                         # logger.warning(f"MEXC Price update: {symbol} - {price}")
-                        self.notify_price_update(formatted_symbol, price, timestamp)
+                        self.notify_ticker(symbol, price, timestamp, bid, ask)
 
                 except (ValueError, TypeError) as e:
+                    self._parse_errors_counter.value += 1
                     logger.error(f"[MEXC] Error processing ticker {ticker.get('symbol')}: {e}")
-                    logger.debug(f"[MEXC] Raw message: {json.dumps(data)}")
+                    logger.debug(f"[MEXC] Raw message: {json_codec.dumps(data)}")
 
             return
         except Exception as ex:
             # Todo: Тут также ошибка как и с bitget биржа
             pass
 
+            self._parse_errors_counter.value += 1
             logger.error(f"[MEXC] Message processing failed: {ex}")
             # logger.debug(f"[MEXC] Raw message that failed: {json.dumps(data)[:200]}")
 
-    @staticmethod
-    def get_deposit_withdrawal_status(symbol: str) -> Tuple[Any, Any]:
-        try:
-            symbol = NormalizerSymbolsExchanges.normalize_without_usdt_symbol(symbol)
-
-            api_key = os.getenv("MEXC_API_KEY")
-            api_secret = os.getenv("MEXC_SECRET_KEY")
-
-            if not api_key or not api_secret:
-                raise ValueError("MEXC API credentials not configured")
+    def get_deposit_withdrawal_status(self, symbol: str) -> Optional[Tuple[bool, bool]]:
+        """Статус депозита/withdrawal из снапшота capital config (без запросов к API); None - монеты нет в снапшоте"""
+        coin_status = self.get_coin_status(symbol)
+        if coin_status is None:
+            return None
+        return coin_status.status
+
+    def get_coin_status(self, symbol: str) -> Optional[CoinStatus]:
+        """Статус монеты по всем сетям из снапшота capital config"""
+        coin = NormalizerSymbolsExchanges.normalize_without_usdt_symbol(symbol)
+        return self._capital_config.get(coin)
+
+    async def fetch_deposit_withdrawal_status(self, symbol: str) -> Optional[Tuple[bool, bool]]:
+        if time.time() - self._capital_config_updated_at >= self.capital_config_refresh_interval:
+            await self.refresh_capital_config()
+        return self.get_deposit_withdrawal_status(symbol)
+
+    async def refresh_deposit_withdrawal_snapshot(self):
+        if time.time() - self._capital_config_updated_at >= self.capital_config_refresh_interval:
+            await self.refresh_capital_config()
+
+    async def refresh_capital_config(self):
+        """Загрузить /api/v3/capital/config/getall одним запросом и построить индекс coin -> CoinStatus"""
+        if not self.capital_config_enabled:
+            return
+        async with self._capital_config_lock:
+            # Другая корутина могла уже обновить снапшот (или только что неудачно попыталась), пока мы ждали блокировку
+            now = time.time()
+            if (now - self._capital_config_updated_at < self.capital_config_refresh_interval
+                    or now - self._capital_config_attempted_at < self.capital_config_retry_interval):
+                return
+            self._capital_config_attempted_at = now
 
-            base_url = "https://api.mexc.com"
-            endpoint = "/api/v3/capital/config/getall"
+            api_key, api_secret = self._api_key, self._api_secret
             timestamp = int(time.time() * 1000)
 
             # Create signature
@@ -155,8 +205,7 @@ class MexcExchange(Exchange, MexcApiConfig):
                 hashlib.sha256
             ).hexdigest()
 
-            # Build request URL
-            url = f"{base_url}{endpoint}?{query_string}&signature={signature}"
+            url = f"{self.capital_config_url}?{query_string}&signature={signature}"
 
             headers = {
                 "X-MEXC-APIKEY": api_key,
@@ -164,86 +213,111 @@ class MexcExchange(Exchange, MexcApiConfig):
                 "Content-Type": "application/json"
             }
 
-            # Make authenticated request
-            response = requests.get(url, headers=headers, timeout=10)
-
-            if response.status_code != 200:
-                logger.error(f"MEXC API error: HTTP {response.status_code} - {response.text}")
-                return False, False
-
-            data = response.json()
-
-            # Find coin information
-            coin_info = next(
-                (coin for coin in data if coin.get("coin", "").upper() == symbol.upper()),
-                None
-            )
-
-            if not coin_info or "networkList" not in coin_info:
-                return False, False
-
-            # Check deposit/withdrawal status across all networks
-            network_list = coin_info["networkList"]
-            deposit_available = any(net.get("depositEnable", False) for net in network_list)
-            withdraw_available = any(net.get("withdrawEnable", False) for net in network_list)
-
-            logger.debug(f"MEXC deposit/withdrawal status for {symbol}: {deposit_available}, {withdraw_available} ")
-            return deposit_available, withdraw_available
-
-        except Exception as e:
-            print(f"Error checking status for {symbol}: {str(e)}")
-            return False, False
+            async with self.session.get(url, headers=headers,
+                                        timeout=aiohttp.ClientTimeout(total=30)) as response:
+                if response.status != 200:
+                    logger.error(f"MEXC API error: HTTP {response.status} - {await response.text()}")
+                    return
+                data = await response.json()
+
+            capital_config: Dict[str, CoinStatus] = {}
+            for coin_info in data:
+                coin = coin_info.get("coin", "").upper()
+                if not coin:
+                    continue
+
+                networks = [
+                    NetworkStatus(
+                        network=net.get("network", ""),
+                        deposit_enabled=bool(net.get("depositEnable", False)),
+                        withdraw_enabled=bool(net.get("withdrawEnable", False))
+                    )
+                    for net in coin_info.get("networkList", [])
+                ]
+                capital_config[coin] = CoinStatus(
+                    coin=coin,
+                    deposit_enabled=any(net.deposit_enabled for net in networks),
+                    withdraw_enabled=any(net.withdraw_enabled for net in networks),
+                    networks=networks
+                )
+
+            self._capital_config = capital_config
+            self._capital_config_updated_at = time.time()
+            logger.info(f"{self.exchange_name} capital config refreshed: {len(capital_config)} coins")
+
+    @classmethod
+    def check_token_exists(cls, symbol: str) -> Optional[bool]:
+        """Проверка наличия спотового символа на MEXC по кешированному множеству символов.
+
+        :return: True/False, или None пока множество символов ещё не загружено
+        """
+        now = time.time()
+        if now - cls._spot_symbols_updated_at >= cls.spot_symbols_refresh_interval:
+            cls._schedule_spot_symbols_refresh()
+
+        if not cls._spot_symbols_updated_at:
+            return None
+
+        symbol = symbol.upper()
+        if symbol in cls._spot_symbols:
+            return True
+
+        # Негативный кеш: промах доверяем spot_symbols_negative_ttl секунд, потом перепроверяем.
+        # Новый промах сразу планирует обновление (не чаще spot_symbols_min_refresh_gap) -
+        # возможно символ только что залистили
+        if now - cls._spot_symbols_pruned_at >= cls.spot_symbols_min_refresh_gap:
+            cls._prune_spot_symbols_missing(now)
+        expires_at = cls._spot_symbols_missing.get(symbol)
+        if expires_at is None or now >= expires_at:
+            cls._spot_symbols_missing[symbol] = now + cls.spot_symbols_negative_ttl
+            cls._schedule_spot_symbols_refresh()
+        return False
+
+    @classmethod
+    def _prune_spot_symbols_missing(cls, now: float):
+        """Drop expired negative entries, so failing refreshes cannot grow the cache without bound"""
+        cls._spot_symbols_pruned_at = now
+        cls._spot_symbols_missing = {
+            symbol: expires_at for symbol, expires_at in cls._spot_symbols_missing.items() if expires_at > now
+        }
+
+    @classmethod
+    def _schedule_spot_symbols_refresh(cls):
+        if cls._spot_symbols_task and not cls._spot_symbols_task.done():
+            return
+        if time.time() - cls._spot_symbols_attempted_at < cls.spot_symbols_min_refresh_gap:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        cls._spot_symbols_task = loop.create_task(cls.refresh_spot_symbols())
 
-    @staticmethod
-    def check_token_exists(symbol: str):
+    @classmethod
+    async def refresh_spot_symbols(cls):
+        """Загрузить все спотовые символы MEXC одним запросом /api/v3/ticker/price"""
+        cls._spot_symbols_attempted_at = time.time()
         try:
-            url = f"https://api.mexc.com/api/v3/ticker/price?symbol={symbol.upper()}"
             headers = {'Accept': 'application/json'}
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
+                async with session.get(cls.spot_ticker_url, headers=headers) as response:
+                    if response.status != 200:
+                        logger.warning(f"MEXC spot symbols fetch failed: HTTP {response.status} | {await response.text()}")
+                        return
+                    data = await response.json()
+
+            symbols = {item["symbol"].upper() for item in data if item.get("symbol")}
+            if not symbols:
+                logger.warning("MEXC spot symbols fetch returned no symbols")
+                return
 
-            response = requests.get(url, headers=headers, timeout=5)
-
-            # Успешный ответ - токен существует
-            if response.status_code == 200:
-                try:
-                    data = response.json()
-                    if 'price' in data:  # Проверяем наличие цены в ответе
-                        return True
-                except ValueError:
-                    pass
-
-            # Обработка ошибки "invalid symbol"
-            if response.status_code == 400:
-                try:
-                    error_data = response.json()
-                    if error_data.get('code') == -1121:
-                        return False
-                except ValueError:
-                    pass
-
-            logger.warning(f"MEXC token check failed for {symbol}: HTTP {response.status_code} | {response.text}")
-            return False
-
-        except requests.exceptions.RequestException as ex:
-            logger.error(f"Network error checking token {symbol}: {str(ex)}")
-            return False
-        except Exception as ex:
-            logger.error(f"Unexpected error checking token {symbol}: {str(ex)}")
-            return False
-
-    async def send_ping(self):
-        if self.websocket:
-            await self.websocket.send(json.dumps({"method": "ping"}))
-
-    async def _reconnect(self):
-        self._running = False  # Остановим receive_messages и keep_alive
-        try:
-            if self.websocket:
-                await self.websocket.close()
+            # Делистинг: символы, которых больше нет в ответе, исчезают вместе со старым множеством
+            cls._spot_symbols = symbols
+            cls._spot_symbols_updated_at = time.time()
+            cls._spot_symbols_missing = {
+                symbol: expires_at for symbol, expires_at in cls._spot_symbols_missing.items()
+                if symbol not in symbols
+            }
+            logger.info(f"MEXC spot symbols refreshed: {len(symbols)} symbols")
         except Exception as ex:
-            logger.error(f"{self.exchange_name} websocket close error: {ex}")
-
-        await asyncio.sleep(5)
-        logger.info(f"{self.exchange_name} attempting to reconnect...")
-        await self.connect()
-        await asyncio.sleep(4)
-        await self.subscribe(self._exchange_symbols)
+            logger.error(f"Error fetching MEXC spot symbols: {ex}")
@@ -1,16 +1,24 @@
 import asyncio
-import json
 import time
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Tuple, Optional
 
 import websockets
 
+from src.exchanges.ws.connection import WebsocketConnection
+from src.exchanges.ws.subscription_planner import SubscriptionPlanner, ACK_BY_TOPIC
 from src.exchanges.ws.websocket import Exchange
-from src.utils.Normalizer import NormalizerSymbolsExchanges
+from src.utils import json_codec
 from src.utils.logger import logger
 
 
 class OkxExchange(Exchange):
+    data_signatures = ('"channel":"tickers"',)
+    ack_signatures = ('"event":"subscribe"', '"event":"error"')
+
+    connect_options = {"ping_interval": None, "ping_timeout": None}  # Отключаем авто-ping, используем свой
+    # OKX отвечает "pong" только на текстовый "ping" (ping_message по умолчанию)
+    max_symbols_per_connection = 200
+
     def __init__(self):
         """Implementation for OKX exchange"""
         super().__init__("OKX")
@@ -40,95 +48,58 @@ class OkxExchange(Exchange):
             logger.error(f"OKX price fetch error: {e}")
             return 0.0
 
-    async def connect(self):
-        """Connect to MEXC websocket"""
-        try:
-            self.websocket = await websockets.connect(
-                self.ws_url,
-                ping_interval=None,  # Отключаем авто-ping, используем свой
-                ping_timeout=None,
-            )
-            self._running = True
-            logger.info(f"{self.exchange_name} connected to {self.ws_url}")
-            asyncio.create_task(self._keep_alive())
-            asyncio.create_task(self.receive_messages())
-        except Exception as e:
-            logger.error(f"{self.exchange_name} connection error: {e}")
-            raise
+    def _create_subscription_planner(self) -> SubscriptionPlanner:
+        # Лимиты OKX: запрос до 64 KB, 480 запросов подписки в час на соединение
+        return SubscriptionPlanner(self.exchange_name, self._subscription_message,
+                                   max_topics_per_message=100, messages_per_second=3, ack_mode=ACK_BY_TOPIC)
 
-    async def subscribe(self, symbols: List[str]):
-        """Subscribe to market data for the given symbols"""
-        if not symbols:
-            logger.warning(f"No symbols provided for {self.exchange_name}")
+    @staticmethod
+    def _subscription_message(req_id: str, symbols: List[str]) -> Dict[str, Any]:
+        return {
+            "id": req_id,
+            "op": "subscribe",
+            "args": [{"channel": "tickers", "instId": symbol} for symbol in symbols]
+        }
+
+    def _process_ack(self, data: Dict[str, Any], connection: WebsocketConnection):
+        # OKX подтверждает каждый arg отдельно; ошибка приходит без arg
+        if data.get("event") == "error":
+            logger.error(f"{self.exchange_name} subscription error {data.get('code')}: {data.get('msg')}")
             return
-
-        for symbol in symbols:
-            subscription = {
-                "op": "subscribe",
-                "args": [
-                    {
-                        "channel": "tickers",
-                        "instId": symbol
-                    }
-                ]
-            }
-            await self.websocket.send(json.dumps(subscription))
-            self.available_pairs.add(symbol)
-        logger.info(f"{self.exchange_name} subscribed to all tickers")
+        connection.subscription_planner.ack_topic(data.get("arg", {}).get("instId"))
 
     async def _process_message(self, message: str):
         """Process incoming OKX websocket messages"""
         try:
             if isinstance(message, str):
-                data = json.loads(message)
+                data = json_codec.loads(message)
             else:
                 data = message
 
             if data.get("arg", {}).get("channel") == "tickers":
                 for ticker in data.get("data", []):
                     symbol = ticker.get("instId", "").upper()
-                    formatted_symbol = await NormalizerSymbolsExchanges.normalize_symbol('okx', symbol)
                     price = float(ticker.get("last", 0))
+                    bid = self.parse_price(ticker.get("bidPx"))
+                    ask = self.parse_price(ticker.get("askPx"))
                     timestamp = int(ticker.get("ts", time.time() * 1000)) / 1000
 
                     # logger.info(f"OKX Price update: {symbol} - {price}")
-                    if formatted_symbol and price:
-                        self.prices[formatted_symbol] = price
-                        self.notify_price_update(formatted_symbol, price, timestamp)
+                    if symbol and price:
+                        self.notify_ticker(symbol, price, timestamp, bid, ask)
         except Exception as ex:
             pass
+            self._parse_errors_counter.value += 1
             logger.error(f"[OKX] Message processing failed: {ex}")
 
             # logger.error(f"[OKX] Message processing failed: {ex}")
-            logger.debug(f"[OKX] Raw message that failed: {json.dumps(message)}")
+            logger.debug(f"[OKX] Raw message that failed: {json_codec.dumps(message)}")
 
     @staticmethod
-    def get_deposit_withdrawal_status(symbol: str) -> Tuple[Any, Any]:
+    def get_deposit_withdrawal_status(symbol: str) -> Optional[Tuple[bool, bool]]:
         """Get deposit and withdrawal status for a symbol"""
         try:
             return True, True
         except Exception as e:
             logger.error(f"OKX deposit/withdrawal status fetch error: {e}")
-            return None, None
-
-    async def send_ping(self):
-        try:
-            if self.websocket:
-                await self.websocket.send(json.dumps({"op": "ping"}))
-        except Exception as e:
-            logger.warning(f"{self.exchange_name} ping error: {e}")
-            await self._reconnect()
-
-    async def _reconnect(self):
-        self._running = False  # Остановим receive_messages и keep_alive
-        try:
-            if self.websocket:
-                await self.websocket.close()
-        except Exception as ex:
-            logger.error(f"{self.exchange_name} websocket close error: {ex}")
-
-        await asyncio.sleep(5)
-        logger.info(f"{self.exchange_name} attempting to reconnect...")
-        await self.connect()
-        await asyncio.sleep(4)
-        await self.subscribe(self._exchange_symbols)
+            return None
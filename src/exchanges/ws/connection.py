@@ -0,0 +1,37 @@
+import asyncio
+from typing import List, Optional
+
+from src.exchanges.ws.subscription_planner import SubscriptionPlanner
+from src.utils.histogram import RollingHistogram
+
+
+class WebsocketConnection:
+    """One websocket of an exchange carrying one shard of its symbols.
+
+    `symbols` is the shard assigned to this connection (None - the venue's "all tickers"
+    stream); it is what gets resubscribed after this connection alone reconnects.
+    """
+
+    def __init__(self, exchange_name: str, connection_id: int, subscription_planner: SubscriptionPlanner):
+        self.exchange_name = exchange_name
+        self.connection_id = connection_id
+        self.name = f"{exchange_name}#{connection_id}"
+        self.websocket = None
+        self.running = False
+        self.symbols: Optional[List[str]] = []
+        self.subscription_planner = subscription_planner
+        self.reconnect_count = 0
+        self.last_outage = 0.0  # Seconds from disconnect to resubscription on the last reconnect
+        self.down = False  # Outage budget spent: escalated, still retried every max_delay
+
+        # Lifecycle: exactly one reader per connection, which also reconnects it
+        self.reader_task: Optional[asyncio.Task] = None
+
+        # Heartbeat state, maintained by the HeartbeatScheduler
+        self.ping_sent_at: Optional[float] = None  # time.monotonic() of the unanswered ping
+        self.rtt = RollingHistogram()  # Pong round-trip times, seconds
+        self.dead_count = 0  # Times the connection was closed for a missing pong
+
+    def __repr__(self) -> str:
+        shard = "all" if self.symbols is None else len(self.symbols)
+        return f"WebsocketConnection({self.name}, symbols={shard}, running={self.running})"
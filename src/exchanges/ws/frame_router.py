@@ -0,0 +1,73 @@
+from typing import Dict, Iterable, Tuple, Union
+
+# Frame categories
+FRAME_PONG = "pong"  # Answers to our pings: timed by the heartbeat scheduler, not decoded
+FRAME_CONTROL = "control"  # Other service frames: dropped without decoding
+FRAME_ACK = "ack"  # Subscription acks and errors: decoded generically and handed to the subscription planner
+FRAME_DATA = "data"  # Market data channels of the adapter: decoded with its typed schema
+FRAME_OTHER = "other"  # Anything else: decoded generically and handed to the adapter
+
+# Signatures are searched only in the head of a frame, not in the whole payload
+DEFAULT_HEAD_SIZE = 128
+
+
+class FrameRouter:
+    """Classifies raw websocket frames by cheap signatures before JSON decoding.
+
+    An adapter declares exact pong/control frames (plain-text "pong") and substrings that
+    identify pong frames, ack frames, control frames and the data channels it consumes.
+    Signatures are checked in that order; when an adapter declares no data signatures,
+    every remaining frame is treated as data.
+    """
+
+    __slots__ = ("exact_frames", "_max_exact_frame", "_pong_signatures", "_ack_signatures",
+                 "_control_signatures", "_data_signatures", "head_size")
+
+    def __init__(self, control_frames: Iterable[str] = (), control_signatures: Iterable[str] = (),
+                 data_signatures: Iterable[str] = (), ack_signatures: Iterable[str] = (),
+                 pong_frames: Iterable[str] = (), pong_signatures: Iterable[str] = (),
+                 head_size: int = DEFAULT_HEAD_SIZE):
+        # Exact frame (str and bytes) -> category
+        self.exact_frames: Dict[Union[str, bytes], str] = {}
+        for frames, category in ((control_frames, FRAME_CONTROL), (pong_frames, FRAME_PONG)):
+            for frame in frames:
+                self.exact_frames[frame] = self.exact_frames[frame.encode()] = category
+        self._max_exact_frame = max((len(frame) for frame in self.exact_frames), default=-1)
+        self._pong_signatures = self._both_types(pong_signatures)
+        self._ack_signatures = self._both_types(ack_signatures)
+        self._control_signatures = self._both_types(control_signatures)
+        self._data_signatures = self._both_types(data_signatures)
+        self.head_size = head_size
+
+    @staticmethod
+    def _both_types(signatures: Iterable[str]) -> Tuple[Tuple[str, ...], Tuple[bytes, ...]]:
+        """Signatures as str for text frames and as bytes for binary frames"""
+        signatures = tuple(signatures)
+        return signatures, tuple(signature.encode() for signature in signatures)
+
+    def classify(self, message: Union[str, bytes]) -> str:
+        # Length check first: hashing a large frame for the set lookup would cost a full pass
+        if len(message) <= self._max_exact_frame:
+            category = self.exact_frames.get(message)
+            if category is not None:
+                return category
+
+        head = message[:self.head_size]
+        index = 1 if isinstance(message, bytes) else 0
+        for signature in self._pong_signatures[index]:
+            if signature in head:
+                return FRAME_PONG
+        for signature in self._ack_signatures[index]:
+            if signature in head:
+                return FRAME_ACK
+        for signature in self._control_signatures[index]:
+            if signature in head:
+                return FRAME_CONTROL
+
+        data_signatures = self._data_signatures[index]
+        if not data_signatures:
+            return FRAME_DATA
+        for signature in data_signatures:
+            if signature in head:
+                return FRAME_DATA
+        return FRAME_OTHER
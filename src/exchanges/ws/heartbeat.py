@@ -0,0 +1,111 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from src.exchanges.ws.connection import WebsocketConnection
+from src.utils.logger import logger
+
+SendPing = Callable[[WebsocketConnection], Awaitable[None]]
+
+
+class _Heartbeat:
+    __slots__ = ("send_ping", "interval", "pong_timeout", "next_ping")
+
+    def __init__(self, send_ping: SendPing, interval: float, pong_timeout: Optional[float], next_ping: float):
+        self.send_ping = send_ping
+        self.interval = interval
+        self.pong_timeout = pong_timeout
+        self.next_ping = next_ping
+
+
+class HeartbeatScheduler:
+    """One task pinging every registered connection on its venue's interval.
+
+    The pong round trip of every ping is recorded into the connection's RTT histogram.
+    With a pong timeout a connection is pinged again only once the previous ping was
+    answered, and a connection whose pong does not arrive in time is considered dead: its
+    socket is closed, so the connection's reader sees the close and reconnects. The task
+    runs while connections are registered.
+    """
+
+    def __init__(self):
+        self._heartbeats: Dict[WebsocketConnection, _Heartbeat] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._closing: Set[asyncio.Task] = set()
+
+    def register(self, connection: WebsocketConnection, send_ping: SendPing, interval: float,
+                 pong_timeout: Optional[float] = None):
+        """Start (or re-arm after a reconnect) the heartbeat of a connection; the first ping goes out after `interval`"""
+        if interval <= 0:
+            raise ValueError("ping interval must be positive")
+        connection.ping_sent_at = None
+        self._heartbeats[connection] = _Heartbeat(send_ping, interval, pong_timeout, time.monotonic() + interval)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="heartbeat scheduler")
+        self._wakeup.set()
+
+    def unregister(self, connection: WebsocketConnection):
+        self._heartbeats.pop(connection, None)
+        connection.ping_sent_at = None
+
+    def pong(self, connection: WebsocketConnection):
+        """A pong arrived on the connection: record the round trip of the outstanding ping"""
+        sent_at = connection.ping_sent_at
+        if sent_at is None:
+            return  # Pong без нашего ping (ответ на ping сервера или повтор)
+        connection.ping_sent_at = None
+        connection.rtt.record(time.monotonic() - sent_at)
+
+    async def stop(self):
+        self._heartbeats.clear()
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self):
+        while self._heartbeats:
+            self._wakeup.clear()
+            now = time.monotonic()
+            pings = []
+            next_wakeup = now + 60.0
+            for connection, heartbeat in list(self._heartbeats.items()):
+                if not connection.running:
+                    continue  # Соединение переоткрывается, register() заново взведёт heartbeat
+                sent_at = connection.ping_sent_at
+                # Без pong_timeout ping уходит по расписанию, даже если прошлый pong не пришёл
+                if sent_at is not None and heartbeat.pong_timeout is not None:
+                    if now - sent_at >= heartbeat.pong_timeout:
+                        self._close_dead(connection, now - sent_at)
+                        continue
+                    next_wakeup = min(next_wakeup, sent_at + heartbeat.pong_timeout)
+                    continue
+                if heartbeat.next_ping <= now:
+                    heartbeat.next_ping = now + heartbeat.interval
+                    if heartbeat.pong_timeout is not None:
+                        next_wakeup = min(next_wakeup, now + heartbeat.pong_timeout)
+                    connection.ping_sent_at = now
+                    pings.append(heartbeat.send_ping(connection))
+                next_wakeup = min(next_wakeup, heartbeat.next_ping)
+
+            if pings:
+                await asyncio.gather(*pings, return_exceptions=True)
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(0.0, next_wakeup - time.monotonic()))
+            except asyncio.TimeoutError:
+                pass
+
+    def _close_dead(self, connection: WebsocketConnection, silence: float):
+        """Close the socket of a connection that stopped answering pings; its reader reconnects it"""
+        logger.error(f"{connection.name} no pong for {silence:.1f}s, closing dead connection")
+        connection.ping_sent_at = None
+        connection.dead_count += 1
+        websocket = connection.websocket
+        if websocket is None:
+            return
+        # Закрытие может ждать close_timeout - не блокируем пинги остальных соединений
+        task = asyncio.create_task(websocket.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
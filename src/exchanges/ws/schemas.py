@@ -0,0 +1,93 @@
+"""Typed websocket message schemas per exchange (used when msgspec is installed).
+
+Only the fields adapters read are declared; everything else in a frame is skipped by
+the decoder without building Python objects. Price fields are declared as
+float-or-string because venues send them either way - adapters convert them.
+"""
+from typing import Any, Dict, List, Optional, Union
+
+from src.utils.json_codec import msgspec
+
+# Exchange name (lower case) -> top level message struct
+MESSAGE_SCHEMAS: Dict[str, type] = {}
+
+if msgspec is not None:
+    Number = Optional[Union[float, str]]
+
+    class WsStruct(msgspec.Struct):
+        """Struct with dict-like `get`, so adapters handle structs and dicts the same way"""
+
+        def get(self, key: str, default: Any = None) -> Any:
+            value = getattr(self, key, None)
+            return default if value is None else value
+
+    class WsArg(WsStruct):
+        channel: Optional[str] = None
+        instId: Optional[str] = None
+
+    # MEXC: push.tickers
+    class MexcTicker(WsStruct):
+        symbol: Optional[str] = None
+        lastPrice: Number = None
+        bid1: Number = None
+        ask1: Number = None
+
+    class MexcMessage(WsStruct):
+        channel: Optional[str] = None
+        data: Optional[Union[List[MexcTicker], str, int]] = None
+        ts: Optional[int] = None
+
+    # Bitget: ticker
+    class BitgetTicker(WsStruct):
+        instId: Optional[str] = None
+        lastPr: Number = None
+        bidPr: Number = None
+        askPr: Number = None
+        ts: Number = None
+
+    class BitgetMessage(WsStruct):
+        event: Optional[str] = None
+        action: Optional[str] = None
+        arg: Optional[WsArg] = None
+        data: Optional[List[BitgetTicker]] = None
+
+    # Gate.io: futures.tickers
+    class GateTicker(WsStruct):
+        contract: Optional[str] = None
+        last: Number = None
+        highest_bid: Number = None
+        lowest_ask: Number = None
+
+    class GateMessage(WsStruct):
+        event: Optional[str] = None
+        channel: Optional[str] = None
+        time_ms: Optional[int] = None
+        result: Optional[Union[List[GateTicker], Dict[str, Any]]] = None
+
+    # Bybit: tickers.* - deltas carry only the changed fields, so the payload stays a dict for merging
+    class BybitMessage(WsStruct):
+        topic: Optional[str] = None
+        type: Optional[str] = None
+        ts: Optional[int] = None
+        data: Optional[Dict[str, Any]] = None
+
+    # OKX: tickers
+    class OkxTicker(WsStruct):
+        instId: Optional[str] = None
+        last: Number = None
+        bidPx: Number = None
+        askPx: Number = None
+        ts: Number = None
+
+    class OkxMessage(WsStruct):
+        event: Optional[str] = None
+        arg: Optional[WsArg] = None
+        data: Optional[List[OkxTicker]] = None
+
+    MESSAGE_SCHEMAS.update({
+        "mexc": MexcMessage,
+        "bitget": BitgetMessage,
+        "gate": GateMessage,
+        "bybit": BybitMessage,
+        "okx": OkxMessage,
+    })
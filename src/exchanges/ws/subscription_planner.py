@@ -0,0 +1,106 @@
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.utils import json_codec
+from src.utils.logger import logger
+from src.utils.rate_limiter import RateLimiter
+
+# How a venue confirms subscriptions
+ACK_NONE = None  # No usable ack: topics count as subscribed once sent
+ACK_BY_REQUEST = "request"  # One ack per message, echoing the request id
+ACK_BY_TOPIC = "topic"  # One ack per subscribed topic
+
+
+class SubscriptionPlanner:
+    """Packs subscription topics into as few messages as a venue allows.
+
+    `build_message(req_id, topics)` turns one batch into the venue's subscribe payload.
+    Sends are paced by a per-connection rate limiter, and acks (by request id or by
+    topic) move topics from pending to subscribed or failed. One planner serves one
+    connection; reset() forgets all state after a reconnect.
+    """
+
+    def __init__(self, exchange_name: str, build_message: Callable[[str, List[Any]], Dict[str, Any]],
+                 max_topics_per_message: int = 1, messages_per_second: float = 10.0,
+                 ack_mode: Optional[str] = ACK_NONE):
+        if max_topics_per_message < 1:
+            raise ValueError("max_topics_per_message must be at least 1")
+        self.exchange_name = exchange_name
+        self.build_message = build_message
+        self.max_topics_per_message = max_topics_per_message
+        self.ack_mode = ack_mode
+        self.rate_limiter = RateLimiter(rate=messages_per_second)
+
+        self._next_req_id = 0
+        self._pending_requests: Dict[str, Tuple[List[Any], float]] = {}  # req_id -> (topics, sent_at)
+        self._pending_topics: Dict[Any, str] = {}  # topic -> req_id
+        self.subscribed: Set[Any] = set()
+        self.failed: Dict[Any, str] = {}  # topic -> error message
+
+    def reset(self):
+        """Forget all subscriptions (the connection was replaced)"""
+        self._pending_requests.clear()
+        self._pending_topics.clear()
+        self.subscribed.clear()
+        self.failed.clear()
+
+    def plan(self, topics: Iterable[Any]) -> List[Tuple[str, List[Any]]]:
+        """Split topics into (req_id, batch) messages of at most max_topics_per_message topics"""
+        topics = list(dict.fromkeys(topics))  # Без дублей, порядок сохраняется
+        batches = []
+        for start in range(0, len(topics), self.max_topics_per_message):
+            self._next_req_id += 1
+            batches.append((str(self._next_req_id), topics[start:start + self.max_topics_per_message]))
+        return batches
+
+    async def subscribe(self, websocket, topics: Iterable[Any]) -> int:
+        """Send the batched subscriptions and return the number of messages sent"""
+        batches = self.plan(topic for topic in topics if topic not in self.subscribed)
+        for req_id, batch in batches:
+            await self.rate_limiter.wait()
+            await websocket.send(json_codec.dumps(self.build_message(req_id, batch)))
+
+            if self.ack_mode is ACK_NONE:
+                self.subscribed.update(batch)
+                continue
+            self._pending_requests[req_id] = (batch, time.monotonic())
+            for topic in batch:
+                self._pending_topics[topic] = req_id
+        return len(batches)
+
+    def ack_request(self, req_id: Any, success: bool = True, error: Optional[str] = None):
+        """Confirm (or reject) every topic of a message"""
+        pending = self._pending_requests.pop(str(req_id), None)
+        if pending is None:
+            return
+        for topic in pending[0]:
+            self._settle(topic, success, error)
+
+    def ack_topic(self, topic: Any, success: bool = True, error: Optional[str] = None):
+        """Confirm (or reject) a single topic"""
+        req_id = self._pending_topics.get(topic)
+        if req_id is None:
+            return
+        self._settle(topic, success, error)
+        pending = self._pending_requests.get(req_id)
+        if pending is not None and all(t not in self._pending_topics for t in pending[0]):
+            del self._pending_requests[req_id]
+
+    def _settle(self, topic: Any, success: bool, error: Optional[str]):
+        self._pending_topics.pop(topic, None)
+        if success:
+            self.subscribed.add(topic)
+            self.failed.pop(topic, None)
+        else:
+            self.failed[topic] = error or "rejected"
+            logger.error(f"{self.exchange_name} subscription to {topic} rejected: {error}")
+
+    @property
+    def pending_topics(self) -> List[Any]:
+        return list(self._pending_topics)
+
+    def overdue_topics(self, timeout: float) -> List[Any]:
+        """Topics whose ack has not arrived within `timeout` seconds"""
+        deadline = time.monotonic() - timeout
+        return [topic for topics, sent_at in self._pending_requests.values() if sent_at < deadline
+                for topic in topics if topic in self._pending_topics]
@@ -1,35 +1,245 @@
 import asyncio
-import json
+import math
+import random
+import time
 from abc import abstractmethod, ABC
 from typing import Dict, Any, Callable, Set, Optional, List, Tuple
 
 import aiohttp
 import websockets
+from websockets.exceptions import ConnectionClosed
 from collections import defaultdict
 
-from src.entities.entities_spread import TokenPrice
+from src.exchanges.ws.schemas import MESSAGE_SCHEMAS
+from src.exchanges.ws.connection import WebsocketConnection
+from src.exchanges.ws.frame_router import FrameRouter, FRAME_CONTROL, FRAME_DATA, FRAME_ACK, FRAME_PONG, \
+    DEFAULT_HEAD_SIZE
+from src.exchanges.ws.heartbeat import HeartbeatScheduler
+from src.exchanges.ws.subscription_planner import SubscriptionPlanner
+from src.utils import json_codec
+from src.utils.json_codec import MessageDecoder, DECODE_ERRORS
+from src.utils.frame_recorder import FrameRecorder
 from src.utils.logger import logger
+from src.utils.metrics import MetricsRegistry
+from src.utils.price_store import PriceStore, ExchangePricesView
+from src.utils.stage_timer import StageTimer, ExchangeStages
+from src.utils.symbol_registry import SymbolRegistry
+
+
+class ReconnectPolicy:
+    """Exponential backoff with full jitter, bounded by an outage budget.
+
+    The first retry may fire almost immediately; later delays grow up to max_delay.
+    Once reconnecting would exceed outage_budget seconds the connection escalates (it is
+    marked down and shows up in SpreadService.down_connections) and keeps being retried
+    every max_delay while the exchange runs.
+    """
+
+    def __init__(self, initial_delay: float = 0.5, max_delay: float = 30.0, multiplier: float = 2.0,
+                 outage_budget: float = 300.0):
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.outage_budget = outage_budget
+
+    def delay(self, attempt: int) -> float:
+        """Delay before reconnect attempt number `attempt` (0-based)"""
+        return random.uniform(0, min(self.max_delay, self.initial_delay * self.multiplier ** attempt))
 
 
 class Exchange(ABC):
+    # Сигнатуры фреймов для FrameRouter: служебные фреймы отбрасываются без JSON-декодирования
+    pong_frames: Tuple[str, ...] = ("pong",)  # Точные совпадения ответа на ping (plain-text pong)
+    pong_signatures: Tuple[str, ...] = ()  # Подстроки в начале JSON-ответов на ping
+    control_frames: Tuple[str, ...] = ()  # Точные совпадения прочих служебных фреймов
+    control_signatures: Tuple[str, ...] = ()  # Подстроки в начале прочих служебных фреймов
+    data_signatures: Tuple[str, ...] = ()  # Подстроки в начале фреймов с рыночными данными
+    ack_signatures: Tuple[str, ...] = ()  # Подстроки в начале подтверждений/ошибок подписки
+    frame_head_size = DEFAULT_HEAD_SIZE  # Сколько символов начала фрейма просматривают сигнатуры
+
+    # Параметры соединений биржи
+    connect_options: Dict[str, Any] = {}  # kwargs websockets.connect
+    ping_message: Optional[str] = "ping"  # None - websocket ping frame вместо ping-сообщения биржи
+    ping_interval = 10
+    pong_timeout: Optional[float] = 10  # Без pong дольше этого соединение считается мёртвым (None - не проверять)
+    max_symbols_per_connection: Optional[int] = None  # Лимит биржи на тикеры в одном соединении (None - без шардинга)
+    reconnect_policy = ReconnectPolicy()
+
     def __init__(self, exchange_name: str):
         self.exchange_name = exchange_name
-        self.websocket = None
+        self.connections: List[WebsocketConnection] = []  # Шарды символов, по одному websocket на шард
+        self.connection_count: Optional[int] = None  # Минимальное число соединений (по умолчанию из лимита биржи)
         self._running = False
-        self.prices: Dict[str, float] = {}
         self.available_pairs: Set[str] = set()
         self.price_callbacks = []
+        self.connection_down_callbacks = []  # callback(connection) при эскалации обрыва и восстановлении
+
+        # Котировки пишутся на месте в колоночное хранилище (общее для всех бирж после attach_price_store)
+        self.price_store = PriceStore()
+        self.exchange_id = self.price_store.exchange_id(exchange_name)
+
+        # Сырой символ биржи -> (канонический символ, множитель цены), заполняется заранее из метаданных контрактов
+        self.symbol_registry = SymbolRegistry()
+        self._symbol_map = self.symbol_registry.for_exchange(exchange_name)
+
+        # Декодер фреймов: типизированная схема биржи через msgspec, иначе orjson/json
+        self.message_decoder = MessageDecoder(MESSAGE_SCHEMAS.get(exchange_name.lower()))
+        self.frame_router = FrameRouter(self.control_frames, self.control_signatures, self.data_signatures,
+                                        self.ack_signatures, self.pong_frames, self.pong_signatures,
+                                        self.frame_head_size)
+
+        # Пинги всех соединений (общий для всех бирж после attach_heartbeat_scheduler)
+        self.heartbeat_scheduler = HeartbeatScheduler()
+
+        # Локальное время получения текущего фрейма (0 - вне цикла приёма)
+        self.frame_received_at = 0.0
+
+        # Счётчики биржи (общий реестр после attach_metrics)
+        self.attach_metrics(MetricsRegistry())
+
+        # Выборочный тайминг стадий (выключен, пока не задан attach_stage_timer)
+        self.stage_timer: Optional[StageTimer] = None
+        self._stages: Optional[ExchangeStages] = None
+        self.frame_sampled = False  # Текущий фрейм попал в выборку тайминга
+
+        # Запись сырых фреймов (выключена, пока не задан attach_frame_recorder)
+        self.frame_recorder: Optional[FrameRecorder] = None
 
         self._session = None
 
+    def attach_price_store(self, price_store: PriceStore):
+        """Write quotes into a shared price store"""
+        self.price_store = price_store
+        self.exchange_id = price_store.exchange_id(self.exchange_name)
+
+    def attach_symbol_registry(self, symbol_registry: SymbolRegistry):
+        """Resolve raw symbols through a shared symbol registry"""
+        self.symbol_registry = symbol_registry
+        self._symbol_map = symbol_registry.for_exchange(self.exchange_name)
+
+    def attach_heartbeat_scheduler(self, heartbeat_scheduler: HeartbeatScheduler):
+        """Ping connections from a shared heartbeat scheduler"""
+        self.heartbeat_scheduler = heartbeat_scheduler
+
+    def attach_metrics(self, registry: MetricsRegistry):
+        """Bind the exchange's counters and gauges in a (shared) metrics registry"""
+        labels = {"exchange": self.exchange_name}
+        self.metrics = registry
+        self._frames_counter = registry.counter("exchange_frames_total", "Websocket frames received", labels)
+        self._decode_errors_counter = registry.counter(
+            "exchange_frames_dropped_total", "Frames dropped on decode or processing errors",
+            {"exchange": self.exchange_name, "reason": "decode"})
+        self._process_errors_counter = registry.counter(
+            "exchange_frames_dropped_total", "Frames dropped on decode or processing errors",
+            {"exchange": self.exchange_name, "reason": "process"})
+        self._ticks_counter = registry.counter("exchange_ticks_total", "Quotes written to the price store", labels)
+        # Адаптеры увеличивают его, когда отбрасывают тикер из-за ошибки разбора
+        self._parse_errors_counter = registry.counter(
+            "exchange_ticks_dropped_total", "Tickers dropped by adapters on parse errors", labels)
+        self._callback_seconds_counter = registry.counter(
+            "exchange_callback_seconds_total", "Time spent in price update callbacks (fan-out)", labels)
+        self._reconnects_counter = registry.counter("exchange_reconnects_total", "Websocket reconnects", labels)
+        self._connection_down_counter = registry.counter(
+            "exchange_connection_down_total", "Connections whose reconnect outage budget was spent", labels)
+        registry.gauge_callback("exchange_connections", "Websocket connections by state", self._connection_gauges)
+        registry.gauge_callback("exchange_subscriptions_pending", "Subscription topics awaiting an ack",
+                                self._pending_subscription_gauges)
+        registry.gauge_callback("exchange_rtt_seconds", "Median pong round-trip time per connection", self._rtt_gauges)
+        registry.gauge_callback("exchange_connection_down", "1 while a connection is past its outage budget",
+                                self._connection_down_gauges)
+
+    def attach_stage_timer(self, stage_timer: StageTimer):
+        """Time sampled frames stage by stage (applies to readers started afterwards)"""
+        self.stage_timer = stage_timer
+        self._stages = stage_timer.stages(self.exchange_name)
+
+    def attach_frame_recorder(self, frame_recorder: FrameRecorder):
+        """Capture every raw frame (applies to readers started afterwards)"""
+        self.frame_recorder = frame_recorder
+
+    def _connection_gauges(self):
+        running = sum(1 for connection in self.connections if connection.running)
+        yield {"exchange": self.exchange_name, "state": "running"}, running
+        yield {"exchange": self.exchange_name, "state": "down"}, len(self.connections) - running
+
+    def _pending_subscription_gauges(self):
+        pending = sum(len(connection.subscription_planner.pending_topics) for connection in self.connections)
+        yield {"exchange": self.exchange_name}, pending
+
+    def _connection_down_gauges(self):
+        for connection in self.connections:
+            yield {"exchange": self.exchange_name, "connection": connection.name}, int(connection.down)
+
+    def _rtt_gauges(self):
+        for connection in self.connections:
+            yield {"exchange": self.exchange_name, "connection": connection.name}, connection.rtt.quantile(0.5)
+
+    @property
+    def websocket(self):
+        """Websocket of the first connection"""
+        return self.connections[0].websocket if self.connections else None
+
+    @property
+    def prices(self) -> ExchangePricesView:
+        """Last prices of this exchange: symbol -> price (read-only view over the price store)"""
+        return self.price_store.exchange_prices(self.exchange_id)
+
+    def register_connection_down_callback(self, callback):
+        """Register a callback(connection) called when a connection spends its outage budget and when it recovers"""
+        self.connection_down_callbacks.append(callback)
+
+    def _notify_connection_down(self, connection: WebsocketConnection):
+        for callback in self.connection_down_callbacks:
+            try:
+                callback(connection)
+            except Exception as ex:
+                logger.error(f"{connection.name} connection down callback error: {ex}")
+
     def register_price_callback(self, callback):
-        """Register a callback function to be called when prices are updated"""
+        """Register a callback(exchange_id, symbol_id) to be called when prices are updated"""
         self.price_callbacks.append(callback)
 
-    def notify_price_update(self, symbol: str, price: float, timestamp: float):
-        """Notify all registered callbacks about a price update"""
+    def notify_price_update(self, symbol: str, price: float, timestamp: float,
+                            bid: Optional[float] = None, ask: Optional[float] = None):
+        """Write the quote into the price store and notify all registered callbacks"""
+        store = self.price_store
+        symbol_id = store.symbol_id(symbol)
+        # Время получения - момент приёма фрейма, а не разбора тикера
+        store.write(self.exchange_id, symbol_id, price, timestamp, bid, ask, self.frame_received_at or time.time())
+        self._ticks_counter.value += 1
+        started = time.perf_counter()
         for callback in self.price_callbacks:
-            callback(TokenPrice(self.exchange_name, symbol, price, timestamp))
+            callback(self.exchange_id, symbol_id)
+        elapsed = time.perf_counter() - started
+        self._callback_seconds_counter.value += elapsed
+        if self.frame_sampled:
+            self._stages.fanout.record(elapsed)
+
+    def notify_ticker(self, raw_symbol: str, price: float, timestamp: float,
+                      bid: Optional[float] = None, ask: Optional[float] = None):
+        """Resolve a raw exchange symbol to its canonical symbol, scale prices per single coin and store the quote"""
+        sampled = self.frame_sampled
+        if sampled:
+            started = time.perf_counter()
+        resolved = self._symbol_map.get(raw_symbol)
+        if resolved is None:
+            resolved = self.symbol_registry.resolve(self.exchange_name, raw_symbol)
+        symbol, multiplier = resolved
+        if multiplier != 1.0:
+            price /= multiplier
+            bid = bid / multiplier if bid else bid
+            ask = ask / multiplier if ask else ask
+        if sampled:
+            self._stages.normalize.record(time.perf_counter() - started)
+        self.notify_price_update(symbol, price, timestamp, bid, ask)
+
+    @staticmethod
+    def parse_price(value: Any) -> Optional[float]:
+        """Parse an optional price field of a ticker; missing, empty or zero values give None"""
+        if not value:
+            return None
+        price = float(value)
+        return price if price > 0 else None
 
     @abstractmethod
     async def set_exchange_symbols(self, symbols: List[str]):
@@ -45,70 +255,306 @@ class Exchange(ABC):
         return self._session
 
     @abstractmethod
-    def get_deposit_withdrawal_status(self, symbol: str) -> Tuple[bool, bool]:
+    def get_deposit_withdrawal_status(self, symbol: str) -> Optional[Tuple[bool, bool]]:
         """Получить статус депозита и withdrawal для указанного символа
-        :return: (deposit_open: bool, withdrawal_open: bool)
+        :return: (deposit_open: bool, withdrawal_open: bool); None - статус неизвестен (не загружен)
         """
         pass
 
-    @abstractmethod
-    async def connect(self):
+    async def fetch_deposit_withdrawal_status(self, symbol: str) -> Optional[Tuple[bool, bool]]:
+        """Асинхронно получить статус депозита и withdrawal (без блокировки event loop)"""
+        return await asyncio.to_thread(self.get_deposit_withdrawal_status, symbol)
+
+    async def refresh_deposit_withdrawal_snapshot(self):
+        """Обновить кеш статусов биржи целиком (для бирж с bulk API), по умолчанию ничего не делает"""
         pass
 
     @abstractmethod
-    async def subscribe(self, symbols: List[str]):
-        """Subscribe to market data for the given symbols"""
+    def _create_subscription_planner(self) -> SubscriptionPlanner:
+        """Subscription planner with the venue's batching/pacing limits (one per connection)"""
         pass
 
+    def format_symbol(self, symbol: str) -> str:
+        """Symbol in the venue's subscription format"""
+        return symbol
+
+    async def _subscribe_all(self, connection: WebsocketConnection):
+        """Subscribe a connection to the venue's "all tickers" stream (subscribe(None))"""
+        logger.warning(f"No symbols provided for {self.exchange_name}")
+
+    def shard_symbols(self, symbols: List[str]) -> List[List[str]]:
+        """Split symbols into per-connection shards: connection_count or as many as max_symbols_per_connection needs"""
+        shard_count = self.connection_count or 1
+        if self.max_symbols_per_connection:
+            shard_count = max(shard_count, math.ceil(len(symbols) / self.max_symbols_per_connection))
+        shard_count = max(1, min(shard_count, len(symbols)))
+        shard_size = math.ceil(len(symbols) / shard_count)
+        return [symbols[start:start + shard_size] for start in range(0, len(symbols), shard_size)]
+
+    def _new_connection(self) -> WebsocketConnection:
+        connection = WebsocketConnection(self.exchange_name, len(self.connections), self._create_subscription_planner())
+        self.connections.append(connection)
+        return connection
+
+    def add_replay_connection(self, websocket) -> WebsocketConnection:
+        """Add a connection over an in-memory socket (frame replay): no heartbeat, no reconnect.
+
+        The caller reads it with receive_messages() and stops it by clearing connection.running.
+        """
+        connection = self._new_connection()
+        connection.websocket = websocket
+        connection.running = True
+        return connection
+
+    @property
+    def ticks_total(self) -> int:
+        """Quotes written to the price store so far"""
+        return self._ticks_counter.value
+
+    async def connect(self):
+        """Open the first connection; subscribe() opens more when the symbol set needs more shards"""
+        self._running = True
+        connection = self.connections[0] if self.connections else self._new_connection()
+        await self._open_connection(connection)
+        self._start_connection(connection)
+
+    async def _open_connection(self, connection: WebsocketConnection):
+        try:
+            connection.websocket = await websockets.connect(self.ws_url, **self.connect_options)
+        except Exception as e:
+            logger.error(f"{connection.name} connection error: {e}")
+            raise
+        connection.subscription_planner.reset()
+        connection.running = True
+        self.heartbeat_scheduler.register(connection, self.send_ping, self.ping_interval, self.pong_timeout)
+        logger.info(f"{connection.name} connected to {self.ws_url}")
+
+    def _start_connection(self, connection: WebsocketConnection):
+        """Start the single reader task of a connection (no-op if it is running)"""
+        if connection.reader_task is None or connection.reader_task.done():
+            connection.reader_task = asyncio.create_task(self._run_connection(connection),
+                                                         name=f"{connection.name} reader")
+
+    async def _run_connection(self, connection: WebsocketConnection):
+        """The only reader of a connection and the only path that reconnects it"""
+        try:
+            while self._running:
+                await self.receive_messages(connection)
+                if not self._running or not await self._reconnect(connection):
+                    break
+        finally:
+            connection.running = False
+            self.heartbeat_scheduler.unregister(connection)
+
+    async def subscribe(self, symbols: Optional[List[str]]):
+        """Subscribe to market data for the given symbols, spread over as many connections as needed"""
+        if symbols is None:
+            self.connections[0].symbols = None
+            await self._subscribe_connection(self.connections[0])
+            return
+        if not symbols:
+            logger.warning(f"No symbols provided for {self.exchange_name}")
+            return
+
+        symbols = [self.format_symbol(symbol) for symbol in symbols]
+        shards = self.shard_symbols(symbols)
+        for shard_id, shard in enumerate(shards):
+            if shard_id == len(self.connections):
+                connection = self._new_connection()
+                await self._open_connection(connection)
+                self._start_connection(connection)
+            self.connections[shard_id].symbols = shard
+
+        messages = await asyncio.gather(*(self._subscribe_connection(connection)
+                                          for connection in self.connections[:len(shards)]))
+        self.available_pairs.update(symbols)
+        logger.info(f"{self.exchange_name} subscribed to {len(symbols)} tickers "
+                    f"on {len(shards)} connections in {sum(messages)} messages")
+
+    async def _subscribe_connection(self, connection: WebsocketConnection) -> int:
+        """(Re)subscribe one connection to its shard; returns the number of messages sent"""
+        if connection.symbols is None:
+            await self._subscribe_all(connection)
+            return 1
+        try:
+            return await connection.subscription_planner.subscribe(connection.websocket, connection.symbols)
+        except Exception as e:
+            logger.error(f"{connection.name} subscription failed: {e}")
+            return 0
+
     @abstractmethod
     async def _process_message(self, data):
         """Process incoming websocket messages"""
         pass
 
-    @abstractmethod
-    async def send_ping(self):
+    def _process_ack(self, data: Dict[str, Any], connection: WebsocketConnection):
+        """Handle a subscription ack/error frame (routed by ack_signatures), by default ignored"""
         pass
 
-    async def _keep_alive(self):
-        """Поддержание соединения"""
-        while self._running:
-            await asyncio.sleep(10)
-            await self.send_ping()
+    async def send_ping(self, connection: WebsocketConnection):
+        """Send the venue's ping (called by the heartbeat scheduler); pongs are routed back by FrameRouter"""
+        try:
+            if not connection.websocket:
+                return
+            if self.ping_message is None:
+                pong_waiter = await connection.websocket.ping()
+                pong_waiter.add_done_callback(self._pong_frame_callback(connection))
+            else:
+                await connection.websocket.send(self.ping_message)
+        except Exception as e:
+            logger.warning(f"{connection.name} ping error: {e}")
 
-    @abstractmethod
-    async def _reconnect(self):
-        pass
+    def _pong_frame_callback(self, connection: WebsocketConnection):
+        """Done-callback of a websocket ping: the pong frame arrived unless the waiter failed"""
+        def on_pong(waiter):
+            if not waiter.cancelled() and waiter.exception() is None:
+                self.heartbeat_scheduler.pong(connection)
+        return on_pong
+
+    def rtt_stats(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Pong round-trip times (seconds) per connection: count, last, p50, p99, max"""
+        return {connection.name: connection.rtt.summary() for connection in self.connections}
+
+    def rtt(self, quantile: float = 0.5) -> Optional[float]:
+        """Round-trip time of the slowest live connection at the given quantile, None before the first pong"""
+        values = [connection.rtt.quantile(quantile) for connection in self.connections
+                  if connection.running and len(connection.rtt)]
+        return max(values) if values else None
+
+    async def _reconnect(self, connection: WebsocketConnection) -> bool:
+        """Reopen one connection with backoff and resubscribe its shard right away.
 
-    async def receive_messages(self):
-        """Основной цикл приема сообщений"""
+        Once the outage budget is spent the connection is escalated (marked down, counted
+        and reported to the connection down callbacks) and retried every max_delay for as
+        long as the exchange runs. Returns False only when the exchange is closing.
+        """
+        connection.running = False  # Heartbeat не пингует, пока соединение переоткрывается
+        try:
+            if connection.websocket:
+                await connection.websocket.close()
+        except Exception as ex:
+            logger.error(f"{connection.name} websocket close error: {ex}")
+
+        policy = self.reconnect_policy
+        outage_started = time.monotonic()
+        attempt = 0
         while self._running:
+            delay = policy.max_delay if connection.down else policy.delay(attempt)
+            if not connection.down and time.monotonic() - outage_started + delay > policy.outage_budget:
+                connection.down = True
+                self._connection_down_counter.value += 1
+                logger.error(f"{connection.name} outage budget of {policy.outage_budget:.0f}s spent "
+                             f"after {attempt} reconnect attempts, retrying every {policy.max_delay:.0f}s")
+                self._notify_connection_down(connection)
+                delay = policy.max_delay
+            await asyncio.sleep(delay)
+            attempt += 1
+            logger.info(f"{connection.name} reconnect attempt {attempt}...")
             try:
-                message = await self.websocket.recv()
-                # print('Raw data ', message)
-                try:
-                    # @TODO: Исправить обработка pong от bitget т.к он присылает не json а строка. Исправить надо позже
-                    if message == "pong":
-                        #          logger.info(f"Pong received from {self.exchange_name}")
-                        continue
-                    data = json.loads(message)
-                    await self._process_message(data)
-                    # logger.debug(f"{self.exchange_name} response from ws api: {data}")
-                except json.JSONDecodeError:
-                    logger.error(f"{self.exchange_name} non-JSON message: {message}")
-                except Exception as ex:
-                    print(message)
-                    logger.error(f"{self.exchange_name} message processing error: {ex}")
-            except websockets.exceptions.ConnectionClosed:
-                logger.error(f"{self.exchange_name} connection closed, reconnecting...")
-                await self._reconnect()
-                break
+                await self._open_connection(connection)
+            except Exception:
+                continue
+
+            # Подписки шарда уходят сразу, без ожидания подтверждений (темп задаёт планировщик)
+            messages = await self._subscribe_connection(connection)
+            connection.reconnect_count += 1
+            self._reconnects_counter.value += 1
+            connection.last_outage = time.monotonic() - outage_started
+            logger.info(f"{connection.name} resubscribed in {messages} messages "
+                        f"after {connection.last_outage:.2f}s outage")
+            if connection.down:
+                connection.down = False
+                self._notify_connection_down(connection)
+            return True
+        return False
+
+    async def receive_messages(self, connection: WebsocketConnection):
+        """Основной цикл приема сообщений одного соединения; возвращается, когда соединение закрыто"""
+        websocket = connection.websocket
+        classify = self.frame_router.classify
+        decode = self.message_decoder.decode
+        process_message = self._process_message
+        frames = self._frames_counter
+        # Выборка тайминга: каждый sample_every-й фрейм, остальные - только декремент счётчика
+        stages = self._stages
+        sample_every = self.stage_timer.sample_every if stages is not None else 0
+        countdown = sample_every
+        sampled = False
+        perf_counter = time.perf_counter
+        recorder = self.frame_recorder
+        while connection.running:
+            if sample_every:
+                countdown -= 1
+                sampled = countdown == 0
+                if sampled:
+                    countdown = sample_every
+                    started = perf_counter()
+            try:
+                message = await websocket.recv()
+                received_at = time.time()
+                frames.value += 1
+            except ConnectionClosed:
+                if connection.running:
+                    logger.error(f"{connection.name} connection closed, reconnecting...")
+                return
             except Exception as e:
-                logger.error(f"{self.exchange_name} receive error: {e}")
-                # await self._reconnect()
-                break
+                logger.error(f"{connection.name} receive error: {e}")
+                return
+
+            if sampled:
+                recv_done = perf_counter()
+                stages.recv.record(recv_done - started)
+            if recorder is not None:
+                recorder.record(self.exchange_name, connection.connection_id, time.monotonic(), received_at, message)
+
+            # print('Raw data ', message)
+            frame_type = classify(message)
+            if frame_type == FRAME_CONTROL:
+                continue
+            if frame_type == FRAME_PONG:
+                self.heartbeat_scheduler.pong(connection)
+                continue
+            try:
+                data = decode(message) if frame_type == FRAME_DATA else json_codec.loads(message)
+            except DECODE_ERRORS:
+                self._decode_errors_counter.value += 1
+                logger.error(f"{connection.name} non-JSON message: {message}")
+                continue
+            if sampled:
+                decoded = perf_counter()
+                stages.decode.record(decoded - recv_done)
+            try:
+                if frame_type == FRAME_ACK:
+                    self._process_ack(data, connection)
+                    continue
+                self.frame_received_at = received_at
+                self.frame_sampled = sampled
+                await process_message(data)
+                if sampled:
+                    stages.process.record(perf_counter() - decoded)
+                # logger.debug(f"{self.exchange_name} response from ws api: {data}")
+            except Exception as ex:
+                self._process_errors_counter.value += 1
+                logger.error(f"{connection.name} message processing error: {ex}")
+            finally:
+                self.frame_received_at = 0.0
+                self.frame_sampled = False
 
     async def close(self):
+        """Stop every connection: cancel its reader, stop its heartbeat and close the socket"""
         self._running = False
-        if self.websocket:
-            await self.websocket.close()
-            logger.info(f"{self.exchange_name} WebSocket disconnected")
+        tasks = []
+        for connection in self.connections:
+            connection.running = False
+            self.heartbeat_scheduler.unregister(connection)
+            task = connection.reader_task
+            if task and not task.done():
+                task.cancel()
+                tasks.append(task)
+            if connection.websocket:
+                try:
+                    await connection.websocket.close()
+                except Exception as ex:
+                    logger.error(f"{connection.name} websocket close error: {ex}")
+        await asyncio.gather(*tasks, return_exceptions=True)
+        logger.info(f"{self.exchange_name} WebSocket disconnected")
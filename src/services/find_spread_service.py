@@ -1,14 +1,25 @@
 import time
 from collections import defaultdict
-from typing import Any, Dict, Tuple, List
+from typing import Any, Dict, Tuple, List, Set, Optional
 import asyncio
 
 from attr import dataclass
 
 from src.commons.fetch_symbols import ExchangeFetchSymbols
 from src.entities.entities_spread import TokenPrice, SpreadOpportunity
+from src.exchanges.ws.connection import WebsocketConnection
+from src.exchanges.ws.heartbeat import HeartbeatScheduler
 from src.exchanges.ws.websocket import Exchange
+from src.services.token_info import DepositWithdrawalService
+from src.services.metrics_server import MetricsServer
 from src.utils.logger import logger
+from src.utils.metrics import MetricsRegistry
+from src.utils.feed_latency import FeedLatency
+from src.utils.frame_recorder import FrameRecorder
+from src.utils.price_book import PriceBook, DEFAULT_MAX_QUOTE_AGE
+from src.utils.price_store import PriceStore, EXCHANGE_SLOTS
+from src.utils.stage_timer import StageTimer
+from src.utils.symbol_registry import SymbolRegistry
 from src.utils.token_manager import TokenManager
 
 from src.exchanges.mexc import MexcExchange
@@ -17,13 +28,61 @@ from src.exchanges.mexc import MexcExchange
 class SpreadFinder:
     """Class to track token prices and find spread opportunities"""
 
-    def __init__(self, min_spread_percent: float = 5.0):
+    def __init__(self, min_spread_percent: float = 5.0, max_quote_age: float = DEFAULT_MAX_QUOTE_AGE,
+                 max_quote_age_by_exchange: Optional[Dict[str, float]] = None,
+                 price_store: Optional[PriceStore] = None):
         self._exchanges: Dict[str, Exchange] = {}
-        self.token_prices: Dict[Tuple[str, str], TokenPrice] = {}  # (exchange, symbol) -> TokenPrice
+        # Quotes live in the (shared) columnar price store; the book indexes best buy/sell per symbol.
+        # Quotes older than max age are excluded
+        self.price_store = price_store if price_store is not None else PriceStore()
+        self.token_prices = PriceBook(self.price_store, max_quote_age, max_quote_age_by_exchange)
         self.token_manager = TokenManager(
             min_spread_change_percent=2)  # Композиция, Композиция предопочетельно чем наследування
         self.min_spread_percent = min_spread_percent
+        self.alert_spread_percent = 3.0
+        self.status_service = DepositWithdrawalService()  # Статусы депозита/withdrawal только из кеша
         self.spread_callbacks = []
+        self.offline = False  # Без сетевых запросов (replay): нет проверки токена на MEXC и статусов
+
+        # Symbols updated since the last flush; checked once per event-loop iteration
+        self._dirty_symbols: Set[int] = set()
+        self._flush_scheduled = False
+        self._flushed_at = 0.0  # Quotes received after this time have not been evaluated yet
+
+        # Exchange -> receive and receive -> decision latency per exchange
+        self.feed_latency = FeedLatency(self.price_store)
+
+        # Счётчики (общий реестр после attach_metrics)
+        self.attach_metrics(MetricsRegistry())
+
+        # Выборочный тайминг оценки спреда (выключен, пока не задан attach_stage_timer)
+        self.stage_timer: Optional[StageTimer] = None
+        self._evaluate_countdown = 0
+
+    def attach_stage_timer(self, stage_timer: StageTimer):
+        """Time sampled spread evaluations into the stage timer"""
+        self.stage_timer = stage_timer
+        self._evaluate_countdown = stage_timer.sample_every
+
+    def attach_metrics(self, registry: MetricsRegistry):
+        """Bind the finder's counters and gauges in a (shared) metrics registry"""
+        self.metrics = registry
+        self._updates_counter = registry.counter("spread_price_updates_total", "Price updates received by the finder")
+        self._evaluations_counter = registry.counter("spread_evaluations_total", "Symbol spread evaluations")
+        self._flushes_counter = registry.counter("spread_flushes_total", "Batches of symbol evaluations")
+        self._check_errors_counter = registry.counter("spread_check_errors_total", "Failed symbol spread evaluations")
+        self._alerts_counter = registry.counter("spread_alerts_total", "Spreads over the alert threshold")
+        registry.gauge_callback("spread_dirty_symbols", "Symbols waiting for evaluation",
+                                lambda: [({}, len(self._dirty_symbols))])
+        registry.gauge_callback("feed_latency_seconds", "Quote latency per exchange and stage (p50/p99)",
+                                self._feed_latency_gauges)
+
+    def _feed_latency_gauges(self):
+        for exchange, stages in self.feed_latency.snapshot().items():
+            for stage, summary in stages.items():
+                if summary["count"]:
+                    for quantile, key in (("0.5", "p50"), ("0.99", "p99")):
+                        yield {"exchange": exchange, "stage": stage, "quantile": quantile}, summary[key]
 
     @property
     def exchanges(self) -> Dict[str, Exchange]:
@@ -39,105 +98,202 @@ class SpreadFinder:
         """Register a callback function to be called when a spread opportunity is found"""
         self.spread_callbacks.append(callback)
 
-    def price_update(self, price_data: TokenPrice):
-        """Process a price update and check for spread opportunities"""
-        # Update the price in our tracking dictionary
-        key = (price_data.exchange, price_data.symbol)
-        self.token_prices[key] = price_data
-        # Check for spread opportunities with this symbol
-        self._check_spreads(price_data.symbol)
-
-    def _check_spreads(self, symbol: str):
+    def price_update(self, exchange_id: int, symbol_id: int):
+        """Process a price update written to the price store and schedule a spread check for its symbol"""
+        self._updates_counter.value += 1
+        self.feed_latency.record_receive(exchange_id, symbol_id * EXCHANGE_SLOTS + exchange_id)
+        # Update the best buy/sell index of the symbol
+        self.token_prices.update(exchange_id, symbol_id)
+        # Mark the symbol dirty; a burst of updates is checked once per symbol
+        self._dirty_symbols.add(symbol_id)
+
+        if not self._flush_scheduled:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # No event loop (synchronous caller): check right away
+                self.flush_dirty_symbols()
+                return
+            self._flush_scheduled = True
+            loop.call_soon(self.flush_dirty_symbols)
+
+    def flush_dirty_symbols(self):
+        """Check spreads for every symbol updated since the last flush"""
+        self._flush_scheduled = False
+        dirty_symbols = self._dirty_symbols
+        self._dirty_symbols = set()
+        previous_flush, self._flushed_at = self._flushed_at, time.time()
+        self._flushes_counter.value += 1
+        self._evaluations_counter.value += len(dirty_symbols)
+
+        for symbol_id in dirty_symbols:
+            sampled = False
+            if self._evaluate_countdown:
+                self._evaluate_countdown -= 1
+                sampled = self._evaluate_countdown == 0
+                if sampled:
+                    self._evaluate_countdown = self.stage_timer.sample_every
+                    started = time.perf_counter()
+            try:
+                self._check_spreads(symbol_id)
+            except Exception as ex:
+                self._check_errors_counter.value += 1
+                logger.error(f"Spread check error for {self.price_store.symbols[symbol_id]}: {ex}")
+            self._record_decisions(symbol_id, previous_flush, time.perf_counter() - started if sampled else None)
+
+    def _record_decisions(self, symbol_id: int, since: float, evaluate_seconds: Optional[float] = None):
+        """Record receive -> decision latency (and the sampled evaluate time) of the symbol's quotes received after `since`"""
+        quotes = self.token_prices.get_quotes(symbol_id)
+        if quotes is None:
+            return
+        decided_at = time.time()
+        store = self.price_store
+        received_at = store.received_at
+        base_slot = symbol_id * EXCHANGE_SLOTS
+        for exchange_id in quotes.exchange_ids:
+            slot = base_slot + exchange_id
+            if received_at[slot] > since:
+                self.feed_latency.record_decision(exchange_id, slot, decided_at)
+                if evaluate_seconds is not None:
+                    self.stage_timer.stages(store.exchange_names[exchange_id]).evaluate.record(evaluate_seconds)
+
+    def _check_spreads(self, symbol_id: int):
         """Check for spread opportunities for a specific symbol"""
 
-        # Find all exchanges that have this symbol
-        exchanges_with_symbol = []
-        for (exchange, s), price_data in self.token_prices.items():
-            if s == symbol:
-                exchanges_with_symbol.append(exchange)
+        # All exchanges that quote this symbol
+        quotes = self.token_prices.get_quotes(symbol_id)
 
-        if len(exchanges_with_symbol) < 2:
+        if quotes is None or len(quotes) < 2:
             return  # Need at least two exchanges for a spread
 
-        # Find the best buy (lowest price) and best sell (highest price)
-        buy_exchange = None
-        buy_price = float('inf')
-        sell_exchange = None
-        sell_price = 0
+        # Executable spread: buy at the lowest ask, sell at the highest bid (tracked incrementally).
+        # Stale quotes are evicted on the way
+        now = time.time()
+        best_buy = quotes.best_buy(now)
+        best_sell = quotes.best_sell(now)
 
-        for exchange in exchanges_with_symbol:
-            original_symbol = next(
-                s for (ex, s) in self.token_prices.keys()
-                if ex == exchange and s == symbol
-            )
+        if best_buy is None or best_sell is None or best_buy == best_sell:
+            return
 
-            price_data = self.token_prices.get((exchange, original_symbol))
+        store = self.price_store
+        base_slot = symbol_id * EXCHANGE_SLOTS
+        buy_price = store.buy_price(base_slot + best_buy)
+        sell_price = store.sell_price(base_slot + best_sell)
 
-            if not price_data:
-                continue
+        # Calculate spread
+        spread_percent = ((sell_price - buy_price) / buy_price) * 100
+
+        if spread_percent > self.alert_spread_percent:
+            quoted_at = max(self._quote_time(base_slot + best_buy), self._quote_time(base_slot + best_sell))
+            self._report_spread(store.symbols[symbol_id], store.exchange_names[best_buy], buy_price,
+                                store.exchange_names[best_sell], sell_price, spread_percent, quoted_at)
+
+    def _quote_time(self, slot: int) -> float:
+        """Exchange event time of the quote in the store cell (local receive time if the exchange sent none)"""
+        store = self.price_store
+        return store.timestamp[slot] or store.received_at[slot]
+
+    def _report_spread(self, symbol: str, buy_exchange: str, buy_price: float,
+                       sell_exchange: str, sell_price: float, spread_percent: float, quoted_at: float):
+        """Report a spread that crossed the alert threshold; quoted_at - time of the newer leg"""
+        self._alerts_counter.value += 1
+        if not self.token_manager.should_notify(symbol, spread_percent):
+            return
 
-            if price_data.price < buy_price:
-                buy_price = price_data.price
-                buy_exchange = exchange
+        if self.offline:
+            buy_status = sell_status = None
+        else:
+            token_exists: bool = MexcExchange.check_token_exists(symbol)
+            if token_exists is False:
+                return
+
+            buy_status = self._get_exchange_status(buy_exchange, symbol)
+            sell_status = self._get_exchange_status(sell_exchange, symbol)
+
+        logger.warning(
+            f"Spread for {symbol}: {spread_percent:.2f}%\n"
+            f"Buy: {buy_exchange} @ {buy_price} {self._format_status(buy_status)}\n"
+            f"Sell: {sell_exchange} @ {sell_price} {self._format_status(sell_status)}"
+        )
+
+        if spread_percent >= self.min_spread_percent:
+            # We found a viable spread opportunity
+            opportunity = SpreadOpportunity(
+                base_token=symbol,
+                buy_exchange=buy_exchange,
+                buy_price=buy_price,
+                sell_exchange=sell_exchange,
+                sell_price=sell_price,
+                spread_percent=spread_percent,
+                timestamp=quoted_at  # Время котировок, а не обработки: воспроизведение детерминировано
+            )
 
-            if price_data.price > sell_price:
-                sell_price = price_data.price
-                sell_exchange = exchange
+            # Notify all registered callbacks
+            for callback in self.spread_callbacks:
+                callback(opportunity)
 
-        # Calculate spread
+    async def start(self):
+        """Start background work of the finder"""
+        if self.offline:
+            return
+        await MexcExchange.refresh_spot_symbols()  # Предзагрузка множества символов для check_token_exists
+        await self.status_service.start()
 
-        if buy_exchange and sell_exchange and buy_exchange != sell_exchange:
-            spread_percent = ((sell_price - buy_price) / buy_price) * 100
-
-            if spread_percent > 3 and self.token_manager.should_notify(symbol, spread_percent):
-                token_exists: bool = MexcExchange.check_token_exists(symbol)
-                if token_exists is False:
-                    return
-
-                buy_status = self._get_exchange_status(buy_exchange, symbol)
-                sell_status = self._get_exchange_status(sell_exchange, symbol)
-
-                logger.warning(
-                    f"Spread for {symbol}: {spread_percent:.2f}%\n"
-                    f"Buy: {buy_exchange} @ {buy_price} (Deposit: {'OPEN' if buy_status[0] else 'CLOSED'}, Withdraw: {'OPEN' if buy_status[1] else 'CLOSED'})\n"
-                    f"Sell: {sell_exchange} @ {sell_price} (Deposit: {'OPEN' if sell_status[0] else 'CLOSED'}, Withdraw: {'OPEN' if sell_status[1] else 'CLOSED'})"
-                )
-
-            # if spread_percent >= self.min_spread_percent:
-            #     # We found a viable spread opportunity
-            #     opportunity = SpreadOpportunity(
-            #         base_token=symbol,
-            #         buy_exchange=buy_exchange,
-            #         buy_price=buy_price,
-            #         sell_exchange=sell_exchange,
-            #         sell_price=sell_price,
-            #         spread_percent=spread_percent,
-            #         timestamp=max(
-            #             self.token_prices[(buy_exchange, symbol)].timestamp,
-            #             self.token_prices[(sell_exchange, symbol)].timestamp
-            #         )
-            #     )
-            #
-            #     # Notify all registered callbacks
-            #     for callback in self.spread_callbacks:
-            #         callback(opportunity)
-
-    def _get_exchange_status(self, exchange_name: str, symbol: str) -> Tuple[bool, bool]:
-        """Получить статус депозита/withdrawal для биржи"""
-        exchange = self.exchanges.get(exchange_name)
-        if exchange:
-            return exchange.get_deposit_withdrawal_status(symbol)
-        return False, False
+    async def stop(self):
+        """Stop background work of the finder"""
+        await self.status_service.stop()
+
+    def _get_exchange_status(self, exchange_name: str, symbol: str) -> Optional[Tuple[bool, bool]]:
+        """Получить статус депозита/withdrawal для биржи из кеша (None - статус ещё не загружен)"""
+        return self.status_service.get_cached_status(exchange_name, symbol)
+
+    @staticmethod
+    def _format_status(status: Optional[Tuple[bool, bool]]) -> str:
+        if status is None:
+            return "(Deposit: UNKNOWN, Withdraw: UNKNOWN)"
+        return (f"(Deposit: {'OPEN' if status[0] else 'CLOSED'}, "
+                f"Withdraw: {'OPEN' if status[1] else 'CLOSED'})")
 
 
 class SpreadService:
     """Main service class to orchestrate the spread finding process"""
 
-    def __init__(self, min_spread_percent: float = 1.0):
+    ENGINE_CALLBACK = "callback"
+    ENGINE_MATRIX = "matrix"
+
+    def __init__(self, min_spread_percent: float = 1.0, engine: str = ENGINE_CALLBACK,
+                 scan_interval: float = 0.05, metrics_port: Optional[int] = None,
+                 stage_sample_every: int = 0, frame_recorder: Optional[FrameRecorder] = None):
         self._exchanges: Dict[str, Exchange] = {}
-        self.spread_finder = SpreadFinder(min_spread_percent)
+        self.price_store = PriceStore()  # Общее колоночное хранилище котировок всех бирж
+        self.symbol_registry = SymbolRegistry()  # Сырые символы бирж -> канонические, общий для всех бирж
+        self.heartbeat_scheduler = HeartbeatScheduler()  # Одна задача пингует соединения всех бирж
+        self.down_connections: Set[str] = set()  # Соединения, исчерпавшие outage budget (котировки шарда не идут)
+        self.spread_finder = self._create_spread_finder(engine, min_spread_percent, scan_interval, self.price_store)
         self.running = False
 
+        # Метрики всех бирж и поиска спредов; /metrics поднимается, если задан metrics_port
+        self.metrics = MetricsRegistry()
+        self.spread_finder.attach_metrics(self.metrics)
+        self._opportunities_counter = self.metrics.counter("spread_opportunities_total", "Spread opportunities found")
+        self.metrics.gauge_callback("spread_service_exchanges", "Registered exchanges",
+                                    lambda: [({}, len(self._exchanges))])
+        self.metrics.gauge_callback("spread_service_connections_down", "Connections past their outage budget",
+                                    lambda: [({}, len(self.down_connections))])
+        self.metrics_server = MetricsServer(self.metrics, port=metrics_port) if metrics_port else None
+
+        # Тайминг стадий каждого stage_sample_every-го фрейма (0 - выключен)
+        self.stage_timer = StageTimer(stage_sample_every)
+        if stage_sample_every:
+            self.spread_finder.attach_stage_timer(self.stage_timer)
+
+        # Запись сырых фреймов всех бирж (для воспроизведения и бенчмарков)
+        self.frame_recorder = frame_recorder
+        if frame_recorder is not None:
+            self.metrics.gauge_callback("frame_recorder_frames", "Captured websocket frames by outcome",
+                                        lambda: [({"outcome": "recorded"}, frame_recorder.recorded),
+                                                 ({"outcome": "dropped"}, frame_recorder.dropped)])
+
         # Register the default callback for spread opportunities
         self.spread_finder.register_spread_callback(self._on_spread_opportunity)
 
@@ -145,6 +301,17 @@ class SpreadService:
     def exchanges(self) -> Dict[str, Exchange]:
         return self._exchanges
 
+    @staticmethod
+    def _create_spread_finder(engine: str, min_spread_percent: float, scan_interval: float,
+                              price_store: PriceStore) -> SpreadFinder:
+        """Create the detection engine: per-tick callbacks or the vectorized matrix scan"""
+        if engine == SpreadService.ENGINE_CALLBACK:
+            return SpreadFinder(min_spread_percent, price_store=price_store)
+        if engine == SpreadService.ENGINE_MATRIX:
+            from src.services.spread_matrix import SpreadMatrixFinder  # numpy is only needed for this engine
+            return SpreadMatrixFinder(min_spread_percent, scan_interval=scan_interval, price_store=price_store)
+        raise ValueError(f"Unknown spread engine: {engine}")
+
     def add_exchange(self, exchange: Exchange):
         """Add an exchange to the service"""
         if not exchange or not exchange.exchange_name:
@@ -155,11 +322,74 @@ class SpreadService:
             return
 
         self._exchanges[exchange.exchange_name] = exchange
+        exchange.attach_price_store(self.price_store)
+        exchange.attach_symbol_registry(self.symbol_registry)
+        exchange.attach_heartbeat_scheduler(self.heartbeat_scheduler)
+        exchange.attach_metrics(self.metrics)
+        if self.stage_timer.sample_every:
+            exchange.attach_stage_timer(self.stage_timer)
+        if self.frame_recorder is not None:
+            exchange.attach_frame_recorder(self.frame_recorder)
         exchange.register_price_callback(self.spread_finder.price_update)
+        exchange.register_connection_down_callback(self._on_connection_down)
         self.spread_finder.exchanges = self._exchanges
+        self.spread_finder.status_service.register_exchange(exchange)
+
+    def feed_latency(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Exchange -> receive and receive -> decision latency histograms per exchange, seconds"""
+        return self.spread_finder.feed_latency.snapshot()
+
+    def runtime_report(self) -> str:
+        """Sizes of the long-lived caches and the live asyncio tasks (for memory reports)"""
+        finder = self.spread_finder
+        store = self.price_store
+        lines = [
+            "Service state:",
+            f"  token_states: {len(finder.token_manager.token_states)}",
+            f"  price store: {len(store.symbols)} symbols, {len(store.exchange_names)} exchanges",
+            f"  price book quotes: {len(finder.token_prices)}",
+            f"  dirty symbols: {len(finder._dirty_symbols)}",
+            f"  down connections: {', '.join(sorted(self.down_connections)) or 'none'}",
+        ]
+        for name, exchange in self.exchanges.items():
+            running = sum(1 for connection in exchange.connections if connection.running)
+            lines.append(f"  {name}: {len(exchange.prices)} prices, {len(exchange.available_pairs)} pairs, "
+                         f"{running}/{len(exchange.connections)} connections running")
+
+        tasks = defaultdict(int)
+        for task in asyncio.all_tasks():
+            coroutine = task.get_coro()
+            tasks[getattr(coroutine, "__qualname__", repr(coroutine))] += 1
+        lines.append(f"Asyncio tasks: {sum(tasks.values())}")
+        lines += [f"  {count:>5} {name}" for name, count in sorted(tasks.items(), key=lambda item: -item[1])]
+        return "\n".join(lines)
+
+    def dump_stage_timings(self, path: Optional[str] = None) -> str:
+        """Log the per-stage timing table (and write it to `path` if given)"""
+        report = self.stage_timer.report()
+        logger.info(f"Stage timings (us), 1 in {self.stage_timer.sample_every} frames:\n{report}")
+        if path:
+            with open(path, "w") as file:
+                file.write(report + "\n")
+        return report
+
+    def exchange_rtt(self, quantile: float = 0.5) -> Dict[str, Optional[float]]:
+        """Websocket round-trip time per exchange (slowest connection), None before the first pong"""
+        return {name: exchange.rtt(quantile) for name, exchange in self.exchanges.items()}
+
+    def _on_connection_down(self, connection: WebsocketConnection):
+        """A connection spent its outage budget (connection.down) or recovered afterwards"""
+        if connection.down:
+            self.down_connections.add(connection.name)
+            logger.error(f"{connection.name} is down past its outage budget, its symbols get no quotes; "
+                            f"down connections: {sorted(self.down_connections)}")
+        else:
+            self.down_connections.discard(connection.name)
+            logger.warning(f"{connection.name} recovered after escalation")
 
     def _on_spread_opportunity(self, opportunity: SpreadOpportunity):
         """Default callback for when a spread opportunity is found"""
+        self._opportunities_counter.value += 1
         logger.info(f"Found spread opportunity: {opportunity}")
         # You could implement additional logic here:
         # - Store opportunity in a database
@@ -173,7 +403,17 @@ class SpreadService:
 
         self.running = True
 
-        all_symbols_exchange = await ExchangeFetchSymbols.get_all_symbols_exchange()
+        if self.metrics_server is not None:
+            await self.metrics_server.start()
+        if self.frame_recorder is not None:
+            self.frame_recorder.start()
+        await self.spread_finder.start()
+
+        # Canonical symbols are resolved once from contract metadata, not per ticker
+        all_contracts_exchange = await ExchangeFetchSymbols.get_all_contracts_exchange()
+        for contracts in all_contracts_exchange.values():
+            self.symbol_registry.register_contracts(contracts)
+        all_symbols_exchange = ExchangeFetchSymbols.symbols_from_contracts(all_contracts_exchange)
 
         # Connect to all exchanges
         connect_tasks = []
@@ -191,22 +431,21 @@ class SpreadService:
 
             await exchange.set_exchange_symbols(symbols)
             subscribe_tasks.append(exchange.subscribe(symbols))
-        print(subscribe_tasks)
         await asyncio.gather(*subscribe_tasks)
-
-        # Start receiving messages from all exchanges
-        receive_tasks = []
-        for exchange in self.exchanges.values():
-            receive_tasks.append(exchange.receive_messages())
-
-        # Run all tasks concurrently
-        await asyncio.gather(*receive_tasks)
+        # Each connection is read by its own reader task started in connect()/subscribe()
 
     async def stop(self):
         """Stop the spread service"""
         self.running = False
+        await self.spread_finder.stop()
+
         close_tasks = []
         for exchange in self.exchanges.values():
             close_tasks.append(exchange.close())
 
         await asyncio.gather(*close_tasks)
+        await self.heartbeat_scheduler.stop()
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+        if self.frame_recorder is not None:
+            await asyncio.to_thread(self.frame_recorder.close)
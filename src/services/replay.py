@@ -0,0 +1,232 @@
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from websockets.exceptions import ConnectionClosed
+
+from src.entities.entities_spread import SpreadOpportunity
+from src.exchanges.ws.connection import WebsocketConnection
+from src.exchanges.ws.websocket import Exchange
+from src.services.find_spread_service import SpreadService
+from src.utils.frame_recorder import RecordedFrame, read_capture
+from src.utils.logger import logger
+
+
+class ReplaySocket:
+    """In-memory websocket for one recorded connection: hands frames to the reader one at a time.
+
+    `idle` is set while the reader waits in recv(), i.e. after it has fully processed the
+    previous frame; the driver waits for it before and after every frame, so each frame
+    goes through the adapter to completion before the next one is delivered.
+    """
+
+    def __init__(self):
+        self.idle = asyncio.Event()
+        self._frames: "asyncio.Queue[Optional[Union[str, bytes]]]" = asyncio.Queue()
+
+    async def recv(self) -> Union[str, bytes]:
+        self.idle.set()
+        frame = await self._frames.get()
+        if frame is None:
+            raise ConnectionClosed(None, None)
+        return frame
+
+    async def feed(self, frame: Union[str, bytes]):
+        """Deliver one frame and wait until the reader is back in recv()"""
+        await self.idle.wait()
+        self.idle.clear()
+        self._frames.put_nowait(frame)
+        await self.idle.wait()
+
+    async def send(self, message):
+        pass  # Подписки и пинги в воспроизведении никуда не уходят
+
+    async def ping(self, data=None):
+        pass
+
+    async def close(self):
+        self._frames.put_nowait(None)
+
+
+@dataclass
+class ReplayReport:
+    """Result of one replay run"""
+    frames: int = 0
+    skipped: int = 0  # Фреймы бирж, не добавленных в сервис
+    frames_by_exchange: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    ticks: int = 0
+    recorded_seconds: float = 0.0  # Длительность записи по monotonic-времени фреймов
+    elapsed_seconds: float = 0.0
+    max_lag: float = 0.0  # Наибольшее отставание от расписания в режиме реального времени
+    opportunities: List[SpreadOpportunity] = field(default_factory=list)
+    receive_to_decision: Dict[str, Dict[str, Optional[float]]] = field(default_factory=dict)
+    stage_timings: Optional[str] = None
+
+    @property
+    def frames_per_second(self) -> float:
+        return self.frames / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    @property
+    def ticks_per_second(self) -> float:
+        return self.ticks / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def summary(self) -> str:
+        lines = [
+            f"Replayed {self.frames} frames ({self.skipped} skipped) recorded over {self.recorded_seconds:.1f}s "
+            f"in {self.elapsed_seconds:.2f}s: {self.frames_per_second:.0f} frames/s, "
+            f"{self.ticks} ticks ({self.ticks_per_second:.0f}/s), max lag {self.max_lag * 1e3:.1f} ms",
+        ]
+        lines += [f"  {name}: {count} frames" for name, count in sorted(self.frames_by_exchange.items())]
+        lines.append(f"Spread opportunities: {len(self.opportunities)}")
+        lines += [f"  {opportunity}" for opportunity in self.opportunities]
+        lines.append("Receive -> decision latency (us):")
+        for name, latency in sorted(self.receive_to_decision.items()):
+            if latency["count"]:
+                lines.append(f"  {name}: {latency['count']} quotes, p50 {latency['p50'] * 1e6:.1f}, "
+                             f"p99 {latency['p99'] * 1e6:.1f}, max {latency['max'] * 1e6:.1f}")
+        if self.stage_timings:
+            lines += ["Stage timings (us):", self.stage_timings]
+        return "\n".join(lines)
+
+
+class ReplayDriver:
+    """Drives a SpreadService from captured websocket frames instead of the network.
+
+    Every recorded connection gets a ReplaySocket read by the exchange's own
+    receive_messages(), so frames go through the same routing, decoding, normalization
+    and spread evaluation as in production. Frames are delivered one at a time in
+    recording order, which makes runs deterministic. speed=None replays as fast as
+    possible; a number replays in real time scaled by it (2.0 - twice as fast).
+
+    The service must not be started: contract metadata, token checks and
+    deposit/withdrawal statuses come from the network, so symbols are resolved by the
+    registry's heuristics and the finder runs offline.
+    """
+
+    def __init__(self, service: SpreadService, speed: Optional[float] = None):
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be positive")
+        self.service = service
+        self.speed = speed
+        self._sockets: Dict[Tuple[str, int], ReplaySocket] = {}
+        self._connections: List[WebsocketConnection] = []
+        self._readers: List[asyncio.Task] = []
+
+    def _socket(self, exchange: Exchange, connection_id: int) -> ReplaySocket:
+        key = (exchange.exchange_name, connection_id)
+        socket = self._sockets.get(key)
+        if socket is None:
+            socket = self._sockets[key] = ReplaySocket()
+            connection = exchange.add_replay_connection(socket)
+            self._connections.append(connection)
+            self._readers.append(asyncio.create_task(self._read(exchange, connection)))
+        return socket
+
+    @staticmethod
+    async def _read(exchange: Exchange, connection: WebsocketConnection):
+        try:
+            await exchange.receive_messages(connection)
+        finally:
+            connection.running = False
+
+    async def run(self, frames: Iterable[RecordedFrame]) -> ReplayReport:
+        """Replay the frames through the service and report what it found"""
+        service = self.service
+        finder = service.spread_finder
+        finder.offline = True
+        report = ReplayReport()
+        finder.register_spread_callback(report.opportunities.append)
+        finder.feed_latency.reset()
+        service.stage_timer.reset()
+        ticks_before = sum(exchange.ticks_total for exchange in service.exchanges.values())
+
+        await finder.start()
+        started = time.monotonic()
+        first_monotonic = None
+        try:
+            for frame in frames:
+                exchange = service.exchanges.get(frame.exchange)
+                if exchange is None:
+                    report.skipped += 1
+                    continue
+                if first_monotonic is None:
+                    first_monotonic = frame.monotonic
+                report.recorded_seconds = frame.monotonic - first_monotonic
+                if self.speed is not None:
+                    delay = started + report.recorded_seconds / self.speed - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    else:
+                        report.max_lag = max(report.max_lag, -delay)
+                await self._socket(exchange, frame.connection_id).feed(frame.frame)
+                report.frames += 1
+                report.frames_by_exchange[frame.exchange] += 1
+            scan = getattr(finder, "scan", None)
+            if scan is not None:
+                scan()  # Матричный движок: последний проход по котировкам после конца записи
+        finally:
+            await self._close()
+            await finder.stop()
+            finder.spread_callbacks.remove(report.opportunities.append)
+
+        report.elapsed_seconds = time.monotonic() - started
+        report.ticks = sum(exchange.ticks_total for exchange in service.exchanges.values()) - ticks_before
+        report.receive_to_decision = {name: latency["receive_to_decision"]
+                                      for name, latency in service.feed_latency().items()}
+        if service.stage_timer.sample_every:
+            report.stage_timings = service.stage_timer.report()
+        return report
+
+    async def _close(self):
+        for connection in self._connections:
+            connection.running = False  # Конец записи, а не обрыв: без сообщения о переподключении
+        for socket in self._sockets.values():
+            await socket.close()
+        await asyncio.gather(*self._readers, return_exceptions=True)
+        self._sockets.clear()
+        self._connections.clear()
+        self._readers.clear()
+
+
+def _exchange_classes() -> Dict[str, type]:
+    from src.exchanges.bingx import BingXExchange
+    from src.exchanges.bitget import BitgetExchange
+    from src.exchanges.bybit import BybitExchange
+    from src.exchanges.gate import GateExchange
+    from src.exchanges.lbank import LBankExchange
+    from src.exchanges.mexc import MexcExchange
+    from src.exchanges.okx import OkxExchange
+    return {cls.__name__: cls for cls in (MexcExchange, BitgetExchange, GateExchange, BybitExchange,
+                                          OkxExchange, BingXExchange, LBankExchange)}
+
+
+async def replay(paths: List[str], speed: Optional[float] = None, engine: str = SpreadService.ENGINE_CALLBACK,
+                 min_spread_percent: float = 1.0, stage_sample_every: int = 0) -> ReplayReport:
+    """Replay capture files (or directories of them) through all exchange adapters"""
+    service = SpreadService(min_spread_percent=min_spread_percent, engine=engine,
+                            stage_sample_every=stage_sample_every)
+    for cls in _exchange_classes().values():
+        service.add_exchange(cls())
+    return await ReplayDriver(service, speed).run(read_capture(paths))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured websocket frames through the spread finder")
+    parser.add_argument("paths", nargs="+", help="Capture files or directories (FRAME_CAPTURE_DIR)")
+    parser.add_argument("--speed", type=float, default=None,
+                        help="Real-time replay speed multiplier (default: as fast as possible)")
+    parser.add_argument("--engine", choices=(SpreadService.ENGINE_CALLBACK, SpreadService.ENGINE_MATRIX),
+                        default=SpreadService.ENGINE_CALLBACK)
+    parser.add_argument("--min-spread", type=float, default=1.0, help="Minimum spread percent of an opportunity")
+    parser.add_argument("--stage-sample", type=int, default=0, help="Time the stages of every N-th frame")
+    args = parser.parse_args()
+
+    report = asyncio.run(replay(args.paths, args.speed, args.engine, args.min_spread, args.stage_sample))
+    logger.info(f"Replay finished\n{report.summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.services.find_spread_service import SpreadFinder
+from src.utils.logger import logger
+from src.utils.price_book import DEFAULT_MAX_QUOTE_AGE
+from src.utils.price_store import PriceStore, EXCHANGE_SLOTS
+
+# Строка тайминга стадий для матричного прохода: он оценивает котировки всех бирж сразу,
+# поэтому время evaluate не раскладывается по биржам
+MATRIX_STAGE_NAME = "MATRIX"
+
+
+class SpreadMatrixFinder(SpreadFinder):
+    """Spread finder that scans the price store as a dense symbols x exchanges matrix on a fixed cadence.
+
+    Adapters write quotes into the columnar price store in place and price_update does
+    nothing; executable spreads (best ask vs best bid) for every symbol are computed in
+    one vectorized pass over zero-copy NumPy views of the store columns every
+    `scan_interval` seconds.
+    """
+
+    def __init__(self, min_spread_percent: float = 5.0, scan_interval: float = 0.05,
+                 max_quote_age: float = DEFAULT_MAX_QUOTE_AGE,
+                 max_quote_age_by_exchange: Optional[Dict[str, float]] = None,
+                 price_store: Optional[PriceStore] = None):
+        super().__init__(min_spread_percent, max_quote_age, max_quote_age_by_exchange, price_store)
+        self.scan_interval = scan_interval
+        self._scan_task: Optional[asyncio.Task] = None
+        self._scanned_at = 0.0  # Quotes received after this time have not been evaluated yet
+
+    def price_update(self, exchange_id: int, symbol_id: int):
+        """The quote is already in the price store; spreads are checked by the next scan"""
+        self._updates_counter.value += 1
+        self.feed_latency.record_receive(exchange_id, symbol_id * EXCHANGE_SLOTS + exchange_id)
+
+    @staticmethod
+    def _matrix(column, dtype, n_symbols: int, n_exchanges: int) -> np.ndarray:
+        """Zero-copy symbols x exchanges view of a store column"""
+        view = np.frombuffer(column, dtype=dtype, count=n_symbols * EXCHANGE_SLOTS)
+        return view.reshape(n_symbols, EXCHANGE_SLOTS)[:, :n_exchanges]
+
+    def _find_candidates(self, n_symbols: int, n_exchanges: int) -> List[Tuple[int, int, float, int, float, float]]:
+        """Vectorized pass over the store: (symbol_id, buy exchange_id, buy price, sell exchange_id, sell price, spread %).
+
+        The NumPy views pin the store buffers, so they must not outlive this call:
+        the store cannot grow while a buffer is exported.
+        """
+        store = self.price_store
+        price = self._matrix(store.price, np.float64, n_symbols, n_exchanges)
+        bid = self._matrix(store.bid, np.float64, n_symbols, n_exchanges)
+        ask = self._matrix(store.ask, np.float64, n_symbols, n_exchanges)
+        received_at = self._matrix(store.received_at, np.float64, n_symbols, n_exchanges)
+        valid = self._matrix(store.version, np.uint64, n_symbols, n_exchanges) != 0
+
+        # Evict quotes older than their exchange's max age
+        max_ages = np.array([self.token_prices.max_age(name) for name in store.exchange_names[:n_exchanges]])
+        stale = valid & (time.time() - received_at > max_ages)
+        if stale.any():
+            for symbol_id, exchange_id in np.argwhere(stale):
+                store.clear(int(symbol_id) * EXCHANGE_SLOTS + int(exchange_id))
+                self.token_prices.stale_skipped[store.exchange_names[exchange_id]] += 1
+            valid &= ~stale
+
+        quote_counts = valid.sum(axis=1)
+
+        # Buy at the lowest ask, sell at the highest bid (last price when the feed has no book quotes)
+        low = np.where(valid, np.where(ask > 0, ask, price), np.inf)
+        high = np.where(valid, np.where(bid > 0, bid, price), -np.inf)
+        buy_idx = low.argmin(axis=1)
+        sell_idx = high.argmax(axis=1)
+
+        rows = np.arange(n_symbols)
+        buy_prices = low[rows, buy_idx]
+        sell_prices = high[rows, sell_idx]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            spreads = (sell_prices - buy_prices) / buy_prices * 100
+
+        candidates = np.flatnonzero(
+            (quote_counts >= 2) & (buy_idx != sell_idx) & (spreads > self.alert_spread_percent)
+        )
+
+        # Every quote received since the previous scan has now been evaluated
+        decided_at = time.time()
+        for symbol_id, exchange_id in np.argwhere(valid & (received_at > self._scanned_at)):
+            self.feed_latency.record_decision(int(exchange_id), int(symbol_id) * EXCHANGE_SLOTS + int(exchange_id),
+                                              decided_at)
+        self._scanned_at = decided_at
+
+        return [
+            (int(row), int(buy_idx[row]), float(buy_prices[row]),
+             int(sell_idx[row]), float(sell_prices[row]), float(spreads[row]))
+            for row in candidates
+        ]
+
+    def scan(self):
+        """Compute the spread for every symbol in one pass and report the ones over the threshold"""
+        store = self.price_store
+        n_symbols = len(store.symbols)
+        n_exchanges = len(store.exchange_names)
+        if n_symbols == 0 or n_exchanges < 2:
+            return
+        self._flushes_counter.value += 1
+        self._evaluations_counter.value += n_symbols
+
+        sampled = False
+        if self._evaluate_countdown:
+            self._evaluate_countdown -= 1
+            sampled = self._evaluate_countdown == 0
+            if sampled:
+                self._evaluate_countdown = self.stage_timer.sample_every
+                started = time.perf_counter()
+        candidates = self._find_candidates(n_symbols, n_exchanges)
+        if sampled:
+            self.stage_timer.stages(MATRIX_STAGE_NAME).evaluate.record(time.perf_counter() - started)
+
+        for symbol_id, buy_id, buy_price, sell_id, sell_price, spread_percent in candidates:
+            base_slot = symbol_id * EXCHANGE_SLOTS
+            quoted_at = max(self._quote_time(base_slot + buy_id), self._quote_time(base_slot + sell_id))
+            self._report_spread(store.symbols[symbol_id], store.exchange_names[buy_id], buy_price,
+                                store.exchange_names[sell_id], sell_price, spread_percent, quoted_at)
+
+    async def _scan_loop(self):
+        while True:
+            await asyncio.sleep(self.scan_interval)
+            try:
+                self.scan()
+            except Exception as ex:
+                self._check_errors_counter.value += 1
+                logger.error(f"Spread matrix scan error: {ex}")
+
+    async def start(self):
+        """Start the periodic matrix scan"""
+        await super().start()
+        if self._scan_task is None:
+            self._scan_task = asyncio.create_task(self._scan_loop())
+
+    async def stop(self):
+        """Stop the periodic matrix scan"""
+        await super().stop()
+        task, self._scan_task = self._scan_task, None
+        if task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
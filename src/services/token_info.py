@@ -1,24 +1,137 @@
-from typing import Tuple
+import asyncio
+import time
+from typing import Tuple, Dict, Optional, Set
+
+from src.exchanges.ws.websocket import Exchange
+from src.utils.logger import logger
 
 
 class DepositWithdrawalService:
-    def __init__(self):
-        self.exchange_handlers = {
-            'mexc': self._check_mexc_status,
-            'binance': self._check_binance_status,
-            # ... другие биржи ...
-        }
-
-    async def get_status(self, exchange: str, symbol: str) -> Tuple[bool, bool]:
-        handler = self.exchange_handlers.get(exchange.lower())
-        if handler:
-            return await handler(symbol)
-        return False, False
-
-    async def _check_mexc_status(self, symbol: str) -> Tuple[bool, bool]:
-        # реализация для MEXC
-        pass
-
-    async def _check_binance_status(self, symbol: str) -> Tuple[bool, bool]:
-        # реализация для Binance
-        pass
\ No newline at end of file
+    """Deposit/withdrawal status per (exchange, symbol) with a TTL cache and background refresh.
+
+    The spread path reads only the cache through get_cached_status; missing or expired
+    entries are fetched in background tasks, so detection never waits on a REST call.
+    A status the exchange could not provide is cached as None (UNKNOWN) for the short
+    unknown_ttl only, so it is retried soon instead of being shown as closed. Only entries
+    read within the last ttl seconds are refreshed; the rest are evicted.
+    """
+
+    def __init__(self, ttl: float = 300.0, refresh_interval: float = 60.0, max_concurrency: int = 4,
+                 unknown_ttl: float = 30.0):
+        self.ttl = ttl
+        self.unknown_ttl = unknown_ttl
+        self.refresh_interval = refresh_interval
+        self.exchange_handlers: Dict[str, Exchange] = {}
+
+        # (exchange, symbol) -> (status, fetched_at); status None - биржа не вернула статус
+        self._cache: Dict[Tuple[str, str], Tuple[Optional[Tuple[bool, bool]], float]] = {}
+        self._last_read: Dict[Tuple[str, str], float] = {}  # (exchange, symbol) -> время последнего чтения
+        self._pending: Set[Tuple[str, str]] = set()
+        self._refresh_tasks: Set[asyncio.Task] = set()  # Ссылки держим, чтобы задачи не собрал GC; отменяются в stop()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def register_exchange(self, exchange: Exchange):
+        """Register an exchange whose status can be fetched"""
+        self.exchange_handlers[exchange.exchange_name.lower()] = exchange
+
+    def _fresh(self, cached: Optional[Tuple[Optional[Tuple[bool, bool]], float]]) -> bool:
+        if cached is None:
+            return False
+        ttl = self.ttl if cached[0] is not None else self.unknown_ttl
+        return time.time() - cached[1] < ttl
+
+    async def get_status(self, exchange: str, symbol: str) -> Optional[Tuple[bool, bool]]:
+        """Get the status, fetching it if the cached value is missing or expired; None if unknown"""
+        key = (exchange.lower(), symbol)
+        self._last_read[key] = time.time()
+        cached = self._cache.get(key)
+        if self._fresh(cached):
+            return cached[0]
+        return await self._refresh(key)
+
+    def get_cached_status(self, exchange: str, symbol: str) -> Optional[Tuple[bool, bool]]:
+        """Non-blocking read of the cached status; None while it is unknown.
+
+        Missing or expired entries are scheduled for a background fetch.
+        """
+        key = (exchange.lower(), symbol)
+        self._last_read[key] = time.time()
+        cached = self._cache.get(key)
+        if self._fresh(cached):
+            return cached[0]
+
+        self._schedule_refresh(key)
+        return None
+
+    def _schedule_refresh(self, key: Tuple[str, str]):
+        if key in self._pending or key[0] not in self.exchange_handlers:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._pending.add(key)
+        task = loop.create_task(self._refresh(key))
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _refresh(self, key: Tuple[str, str]) -> Optional[Tuple[bool, bool]]:
+        exchange_name, symbol = key
+        exchange = self.exchange_handlers.get(exchange_name)
+        if exchange is None:
+            return None
+
+        self._pending.add(key)
+        try:
+            async with self._semaphore:
+                status = await exchange.fetch_deposit_withdrawal_status(symbol)
+            if status is not None:
+                status = (bool(status[0]), bool(status[1]))
+            self._cache[key] = (status, time.time())  # None живёт только unknown_ttl
+            return status
+        except Exception as ex:
+            logger.error(f"{exchange_name} deposit/withdrawal status refresh error for {symbol}: {ex}")
+            return None
+        finally:
+            self._pending.discard(key)
+
+    async def _refresh_snapshots(self):
+        """Let exchanges with bulk status APIs refresh their own snapshots"""
+        names = list(self.exchange_handlers)
+        results = await asyncio.gather(
+            *(self.exchange_handlers[name].refresh_deposit_withdrawal_snapshot() for name in names),
+            return_exceptions=True
+        )
+        for exchange_name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.error(f"{exchange_name} deposit/withdrawal snapshot refresh error: {result}")
+
+    async def _refresh_loop(self):
+        """Refresh exchange snapshots, then every entry read within ttl and older than refresh_interval"""
+        while True:
+            await self._refresh_snapshots()
+            now = time.time()
+            for key, (_, fetched_at) in list(self._cache.items()):
+                if now - self._last_read.get(key, 0.0) >= self.ttl:
+                    # Давно не читали (символ перестал алертить) - не тратим на него REST-квоту
+                    del self._cache[key]
+                    self._last_read.pop(key, None)
+                elif now - fetched_at >= self.refresh_interval:
+                    self._schedule_refresh(key)
+            await asyncio.sleep(self.refresh_interval)
+
+    async def start(self):
+        """Start the background refresh"""
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        """Stop the background refresh and the status fetches in flight"""
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        tasks = list(self._refresh_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,44 @@
+from typing import Dict, List
+
+from src.utils.histogram import HdrHistogram
+from src.utils.price_store import PriceStore, EXCHANGE_SLOTS
+
+
+class FeedLatency:
+    """End-to-end latency of quotes per exchange, measured on the price store cells.
+
+    Every quote carries the exchange event time (`timestamp`) and the local time its frame
+    was received (`received_at`); the spread finder adds the time it finished evaluating
+    the quote. Two bounded histograms per exchange are kept: exchange -> receive (network
+    plus clock offset) and receive -> decision (our own processing).
+    """
+
+    def __init__(self, price_store: PriceStore, max_latency: float = 60.0):
+        self.price_store = price_store
+        self.exchange_to_receive: List[HdrHistogram] = [HdrHistogram(max_latency) for _ in range(EXCHANGE_SLOTS)]
+        self.receive_to_decision: List[HdrHistogram] = [HdrHistogram(max_latency) for _ in range(EXCHANGE_SLOTS)]
+
+    def record_receive(self, exchange_id: int, slot: int):
+        """A quote was written to the store cell: exchange event -> local receive"""
+        store = self.price_store
+        timestamp = store.timestamp[slot]
+        if timestamp:  # 0 - биржа не передала время события
+            self.exchange_to_receive[exchange_id].record(store.received_at[slot] - timestamp)
+
+    def record_decision(self, exchange_id: int, slot: int, decided_at: float):
+        """The quote in the store cell was evaluated at `decided_at`: local receive -> decision"""
+        self.receive_to_decision[exchange_id].record(decided_at - self.price_store.received_at[slot])
+
+    def reset(self):
+        for histogram in self.exchange_to_receive + self.receive_to_decision:
+            histogram.reset()
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Exchange name -> {"exchange_to_receive": summary, "receive_to_decision": summary}, seconds"""
+        return {
+            name: {
+                "exchange_to_receive": self.exchange_to_receive[exchange_id].summary(),
+                "receive_to_decision": self.receive_to_decision[exchange_id].summary(),
+            }
+            for exchange_id, name in enumerate(self.price_store.exchange_names)
+        }
@@ -0,0 +1,204 @@
+import gzip
+import io
+import os
+import queue
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, List, NamedTuple, Optional, Union
+
+from src.utils.logger import logger
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional, gzip is always available
+    zstandard = None
+
+COMPRESSION_GZIP = "gzip"
+COMPRESSION_ZSTD = "zstd"
+SUFFIXES = {COMPRESSION_GZIP: ".frames.gz", COMPRESSION_ZSTD: ".frames.zst"}
+
+FILE_MAGIC = b"WSFRAMES1\n"
+# Record: payload length, monotonic receive time, wall-clock receive time, connection id,
+# exchange name length, flags; then the exchange name and the raw frame
+RECORD_HEADER = struct.Struct("<IddHBB")
+FLAG_BINARY = 1  # The frame was bytes (otherwise text, stored as UTF-8)
+
+
+class RecordedFrame(NamedTuple):
+    exchange: str
+    connection_id: int
+    monotonic: float  # time.monotonic() at receipt, for replay pacing
+    received_at: float  # time.time() at receipt, comparable with exchange timestamps
+    frame: Union[str, bytes]
+
+
+class FrameRecorder:
+    """Append-only capture of raw websocket frames, written by a background thread.
+
+    The reader's hot path only enqueues the frame with its receive times; a writer
+    thread encodes length-prefixed records into a compressed file (gzip, or zstd when
+    the zstandard package is installed) and rotates files by size and age. When the
+    writer cannot keep up, frames are dropped and counted instead of blocking the loop.
+    """
+
+    def __init__(self, directory: str, compression: str = COMPRESSION_GZIP,
+                 max_file_bytes: int = 256 * 2 ** 20, max_file_seconds: float = 3600.0,
+                 queue_size: int = 100_000, flush_interval: float = 1.0):
+        if compression not in SUFFIXES:
+            raise ValueError(f"Unknown compression: {compression}")
+        if compression == COMPRESSION_ZSTD and zstandard is None:
+            raise ValueError("zstd compression requires the zstandard package")
+        self.directory = Path(directory)
+        self.compression = compression
+        self.max_file_bytes = max_file_bytes
+        self.max_file_seconds = max_file_seconds
+        self.flush_interval = flush_interval
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._file: Optional[BinaryIO] = None
+        self._raw_file: Optional[BinaryIO] = None
+        self._file_bytes = 0
+        self._file_opened_at = 0.0
+        self._file_seq = 0
+
+        self.recorded = 0
+        self.dropped = 0  # Frames lost because the queue was full
+        self.files: List[Path] = []
+
+    def record(self, exchange: str, connection_id: int, monotonic: float, received_at: float,
+               frame: Union[str, bytes]):
+        """Enqueue one frame (called from the event loop; never blocks)"""
+        try:
+            self._queue.put_nowait((exchange, connection_id, monotonic, received_at, frame))
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="frame-recorder", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Write out everything enqueued so far and close the current file (blocks until done)"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = ()
+            if item is None:
+                break
+            try:
+                if item:
+                    self._write(item)
+                now = time.monotonic()
+                if self._file is not None and now - last_flush >= self.flush_interval:
+                    self._file.flush()
+                    last_flush = now
+            except Exception as ex:
+                logger.error(f"Frame recorder write error: {ex}")
+        self._close_file()
+
+    def _write(self, item):
+        exchange, connection_id, monotonic, received_at, frame = item
+        if isinstance(frame, str):
+            payload, flags = frame.encode(), 0
+        else:
+            payload, flags = bytes(frame), FLAG_BINARY
+        name = exchange.encode()
+
+        if self._file is None or self._file_bytes >= self.max_file_bytes \
+                or time.monotonic() - self._file_opened_at >= self.max_file_seconds:
+            self._rotate()
+        self._file.write(RECORD_HEADER.pack(len(payload), monotonic, received_at, connection_id, len(name), flags))
+        self._file.write(name)
+        self._file.write(payload)
+        self._file_bytes += RECORD_HEADER.size + len(name) + len(payload)
+        self.recorded += 1
+
+    def _rotate(self):
+        self._close_file()
+        self._file_seq += 1
+        path = self.directory / f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._file_seq:04d}" \
+                                f"{SUFFIXES[self.compression]}"
+        self._raw_file = open(path, "wb")
+        if self.compression == COMPRESSION_ZSTD:
+            self._file = zstandard.ZstdCompressor().stream_writer(self._raw_file)
+        else:
+            self._file = gzip.GzipFile(fileobj=self._raw_file, mode="wb")
+        self._file.write(FILE_MAGIC)
+        self._file_bytes = len(FILE_MAGIC)
+        self._file_opened_at = time.monotonic()
+        self.files.append(path)
+        logger.info(f"Recording websocket frames to {path}")
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._raw_file is not None:
+            self._raw_file.close()
+            self._raw_file = None
+
+
+def _open_capture(path: Path) -> BinaryIO:
+    if path.name.endswith(SUFFIXES[COMPRESSION_ZSTD]):
+        if zstandard is None:
+            raise ValueError("Reading zstd captures requires the zstandard package")
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True))
+    return gzip.open(path, "rb")
+
+
+def read_frames(path: Union[str, Path]) -> Iterator[RecordedFrame]:
+    """Frames of one capture file in recording order; a truncated last record is skipped"""
+    path = Path(path)
+    with _open_capture(path) as file:
+        if file.read(len(FILE_MAGIC)) != FILE_MAGIC:
+            raise ValueError(f"{path} is not a frame capture")
+        while True:
+            try:
+                header = file.read(RECORD_HEADER.size)
+            except EOFError:  # Файл оборван при аварийной остановке
+                return
+            if len(header) < RECORD_HEADER.size:
+                return
+            length, monotonic, received_at, connection_id, name_length, flags = RECORD_HEADER.unpack(header)
+            try:
+                body = file.read(name_length + length)
+            except EOFError:
+                return
+            if len(body) < name_length + length:
+                return
+            payload = body[name_length:]
+            frame = payload if flags & FLAG_BINARY else payload.decode()
+            yield RecordedFrame(body[:name_length].decode(), connection_id, monotonic, received_at, frame)
+
+
+def capture_files(paths: Iterable[Union[str, Path]]) -> List[Path]:
+    """Capture files from files and directories, in name (= recording) order"""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(file for file in path.iterdir()
+                         if any(file.name.endswith(suffix) for suffix in SUFFIXES.values()))
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+def read_capture(paths: Iterable[Union[str, Path]]) -> Iterator[RecordedFrame]:
+    """Frames of several capture files (or directories of them), file after file"""
+    for path in capture_files(paths):
+        yield from read_frames(path)
@@ -0,0 +1,146 @@
+import math
+from array import array
+from collections import deque
+from typing import Dict, Optional
+
+
+class RollingHistogram:
+    """Distribution of the last `size` samples (e.g. round-trip times in seconds).
+
+    Memory is bounded by the window; quantiles are computed on demand by sorting the
+    window, which is cheap for the small windows it is meant for.
+    """
+
+    __slots__ = ("_samples", "count")
+
+    def __init__(self, size: int = 256):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self._samples = deque(maxlen=size)
+        self.count = 0  # Samples recorded since creation, including those rolled out of the window
+
+    def record(self, value: float):
+        self._samples.append(value)
+        self.count += 1
+
+    def clear(self):
+        self._samples.clear()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    @property
+    def last(self) -> Optional[float]:
+        return self._samples[-1] if self._samples else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile q (0..1) of the window, None when empty"""
+        if not 0.0 <= q <= 1.0:
+            raise ValueError("quantile must be between 0 and 1")
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        """Last value, median, p99 and max of the window"""
+        if not self._samples:
+            return {"count": self.count, "last": None, "p50": None, "p99": None, "max": None}
+        ordered = sorted(self._samples)
+        size = len(ordered)
+        return {
+            "count": self.count,
+            "last": self._samples[-1],
+            "p50": ordered[int(0.5 * (size - 1))],
+            "p99": ordered[int(0.99 * (size - 1))],
+            "max": ordered[-1],
+        }
+
+
+# HdrHistogram: values are kept in microseconds in log-linear buckets, 2**HDR_SUB_BUCKET_BITS
+# linear buckets per power of two (relative error under 1 / 2**(HDR_SUB_BUCKET_BITS - 1))
+HDR_SUB_BUCKET_BITS = 5
+HDR_UNIT = 1e-6
+
+
+class HdrHistogram:
+    """HDR-style latency histogram with fixed memory, for seconds-valued samples.
+
+    Values are bucketed in microseconds with bounded relative error, up to `max_value`
+    seconds (larger values fall into the top bucket). Negative values - the exchange
+    clock running ahead of ours - are counted separately and recorded as zero.
+    """
+
+    __slots__ = ("_half", "counts", "count", "negative", "total", "min", "max")
+
+    def __init__(self, max_value: float = 60.0):
+        self._half = 1 << (HDR_SUB_BUCKET_BITS - 1)
+        self.counts = array('Q', bytes(8 * (self._index(int(max_value / HDR_UNIT)) + 1)))
+        self.count = 0
+        self.negative = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _index(self, value: int) -> int:
+        shift = value.bit_length() - HDR_SUB_BUCKET_BITS
+        if shift <= 0:
+            return value
+        return shift * self._half + (value >> shift)
+
+    def _bucket_value(self, index: int) -> float:
+        """Upper bound of a bucket, seconds"""
+        if index < 2 * self._half:
+            return index * HDR_UNIT
+        shift = index // self._half - 1
+        return (((index - shift * self._half) + 1) << shift) * HDR_UNIT
+
+    def record(self, value: float):
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if value < 0:
+            self.negative += 1
+            value = 0.0
+        counts = self.counts
+        counts[min(self._index(int(value / HDR_UNIT)), len(counts) - 1)] += 1
+
+    def reset(self):
+        self.counts = array('Q', bytes(8 * len(self.counts)))
+        self.count = self.negative = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile q (0..1), None when empty"""
+        if not 0.0 <= q <= 1.0:
+            raise ValueError("quantile must be between 0 and 1")
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(self._bucket_value(index), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        """Count, mean, p50/p90/p99/p999 and extremes, seconds"""
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": self.total / self.count,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "p999": self.quantile(0.999),
+            "min": self.min,
+            "max": self.max,
+            "negative": self.negative,
+        }
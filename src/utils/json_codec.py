@@ -0,0 +1,56 @@
+import json
+from typing import Any, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, stdlib json is the fallback
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # msgspec is optional, typed message schemas are disabled without it
+    msgspec = None
+
+# Errors raised on malformed frames by any of the backends
+# (json.JSONDecodeError and orjson.JSONDecodeError are ValueError subclasses)
+DECODE_ERRORS = (ValueError, msgspec.DecodeError) if msgspec is not None else (ValueError,)
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def loads(message: Union[str, bytes]) -> Any:
+    """Decode a JSON document with the fastest available backend"""
+    if orjson is not None:
+        return orjson.loads(message)
+    return json.loads(message)
+
+
+def dumps(obj: Any) -> str:
+    """Encode to a JSON string; handles both plain objects and msgspec structs"""
+    if msgspec is not None:
+        return msgspec.json.encode(obj).decode()
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+
+class MessageDecoder:
+    """Decoder of websocket frames of one exchange.
+
+    With msgspec installed and a schema given, frames are decoded straight into typed
+    structs that keep only the fields the adapter reads. Frames that do not match the
+    schema (rare control messages) are decoded generically, so adapters must accept both
+    structs and dicts - schema structs expose the same `get` as dict for that.
+    """
+
+    def __init__(self, schema: Optional[type] = None):
+        self.schema = schema
+        self._decoder = msgspec.json.Decoder(schema) if msgspec is not None and schema is not None else None
+
+    def decode(self, message: Union[str, bytes]) -> Any:
+        if self._decoder is not None:
+            try:
+                return self._decoder.decode(message)
+            except msgspec.ValidationError:
+                pass
+        return loads(message)
@@ -0,0 +1,127 @@
+import math
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+COUNTER = "counter"
+GAUGE = "gauge"
+
+Labels = Tuple[Tuple[str, str], ...]
+# Gauge evaluated at scrape time: yields (labels, value) pairs
+GaugeCallback = Callable[[], Iterable[Tuple[Dict[str, str], float]]]
+
+
+class Counter:
+    """Monotonic counter bound to one label set; the hot path only does `counter.value += n`"""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class Gauge:
+    """Gauge bound to one label set"""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+
+class _Family:
+    __slots__ = ("name", "help", "type", "children", "callbacks")
+
+    def __init__(self, name: str, help_text: str, metric_type: str):
+        self.name = name
+        self.help = help_text
+        self.type = metric_type
+        self.children: Dict[Labels, object] = {}
+        self.callbacks: List[GaugeCallback] = []
+
+
+class MetricsRegistry:
+    """Registry of counters and gauges rendered in the Prometheus text format.
+
+    Metrics are created once per label set and kept by the caller (pre-bound), so
+    updating one on the hot path is a single attribute increment - no label lookup,
+    no per-event objects. Gauges that are cheaper to read than to maintain (queue
+    sizes, connection states) are registered as callbacks evaluated on scrape.
+    """
+
+    def __init__(self):
+        self._families: Dict[str, _Family] = {}
+
+    def _family(self, name: str, help_text: str, metric_type: str) -> _Family:
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = _Family(name, help_text, metric_type)
+        elif family.type != metric_type:
+            raise ValueError(f"Metric {name} is already registered as a {family.type}")
+        return family
+
+    @staticmethod
+    def _labels(labels: Optional[Dict[str, str]]) -> Labels:
+        return tuple(sorted((labels or {}).items()))
+
+    def counter(self, name: str, help_text: str, labels: Optional[Dict[str, str]] = None) -> Counter:
+        """Counter for the label set (the same object for repeated calls)"""
+        children = self._family(name, help_text, COUNTER).children
+        key = self._labels(labels)
+        counter = children.get(key)
+        if counter is None:
+            counter = children[key] = Counter()
+        return counter
+
+    def gauge(self, name: str, help_text: str, labels: Optional[Dict[str, str]] = None) -> Gauge:
+        """Gauge for the label set (the same object for repeated calls)"""
+        children = self._family(name, help_text, GAUGE).children
+        key = self._labels(labels)
+        gauge = children.get(key)
+        if gauge is None:
+            gauge = children[key] = Gauge()
+        return gauge
+
+    def gauge_callback(self, name: str, help_text: str, callback: GaugeCallback):
+        """Gauge family whose samples are produced by `callback` on every scrape"""
+        self._family(name, help_text, GAUGE).callbacks.append(callback)
+
+    @staticmethod
+    def _format_labels(labels: Labels) -> str:
+        if not labels:
+            return ""
+        pairs = ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels)
+        return "{" + pairs + "}"
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for family in self._families.values():
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.type}")
+            for labels, metric in family.children.items():
+                lines.append(f"{family.name}{self._format_labels(labels)} {_format_value(metric.value)}")
+            for callback in family.callbacks:
+                for labels, value in callback():
+                    lines.append(f"{family.name}{self._format_labels(self._labels(labels))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: Optional[float]) -> str:
+    if value is None:
+        return "NaN"
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
@@ -0,0 +1,150 @@
+from collections import defaultdict
+from heapq import heappush, heappop, heapify
+from typing import Dict, Optional, List, Tuple, Set
+
+from src.entities.entities_spread import TokenPrice
+from src.utils.price_store import PriceStore, EXCHANGE_SLOTS
+
+# Heaps are rebuilt once outdated entries outnumber live quotes by this factor
+HEAP_COMPACT_FACTOR = 4
+HEAP_COMPACT_SLACK = 16
+
+# Quotes not refreshed for this many seconds are excluded from spread calculations
+DEFAULT_MAX_QUOTE_AGE = 60.0
+
+
+class SymbolQuotes:
+    """Quotes for one symbol with incrementally maintained best buy/best sell venue.
+
+    Quotes themselves live in the shared PriceStore. Every update pushes a versioned
+    entry onto a min-heap of buy prices (asks) and a max-heap of sell prices (bids);
+    entries whose version no longer matches the store cell are dropped lazily when they
+    surface on top, so best_buy/best_sell are amortized O(1) reads. A quote older than
+    its exchange's max age is evicted when it surfaces on top of a heap.
+    """
+
+    __slots__ = ("exchange_ids", "_book", "_base_slot", "_min_heap", "_max_heap")
+
+    def __init__(self, book: "PriceBook", symbol_id: int):
+        self._book = book
+        self._base_slot = symbol_id * EXCHANGE_SLOTS
+        self.exchange_ids: Set[int] = set()  # Exchanges with a live quote
+        self._min_heap: List[Tuple[float, int, int]] = []  # (buy_price, version, exchange_id)
+        self._max_heap: List[Tuple[float, int, int]] = []  # (-sell_price, version, exchange_id)
+
+    def update(self, exchange_id: int):
+        store = self._book.store
+        slot = self._base_slot + exchange_id
+        version = store.version[slot]
+        self.exchange_ids.add(exchange_id)
+
+        heappush(self._min_heap, (store.buy_price(slot), version, exchange_id))
+        heappush(self._max_heap, (-store.sell_price(slot), version, exchange_id))
+
+        if len(self._min_heap) > HEAP_COMPACT_FACTOR * len(self.exchange_ids) + HEAP_COMPACT_SLACK:
+            self._compact()
+
+    def remove(self, exchange_id: int):
+        """Drop the quote of an exchange; its heap entries become outdated"""
+        self.exchange_ids.discard(exchange_id)
+        self._book.store.clear(self._base_slot + exchange_id)
+
+    def best_buy(self, now: float) -> Optional[int]:
+        """Exchange ID of the fresh quote with the lowest buy price (best ask)"""
+        return self._top(self._min_heap, now)
+
+    def best_sell(self, now: float) -> Optional[int]:
+        """Exchange ID of the fresh quote with the highest sell price (best bid)"""
+        return self._top(self._max_heap, now)
+
+    def _top(self, heap: List[Tuple[float, int, int]], now: float) -> Optional[int]:
+        book = self._book
+        store = book.store
+        while heap:
+            _, version, exchange_id = heap[0]
+            slot = self._base_slot + exchange_id
+            if store.version[slot] == version:
+                exchange = store.exchange_names[exchange_id]
+                if now - store.received_at[slot] <= book.max_age(exchange):
+                    return exchange_id
+                # Stale quote: evict it so it is skipped only once
+                self.remove(exchange_id)
+                book.stale_skipped[exchange] += 1
+            heappop(heap)
+        return None
+
+    def _compact(self):
+        """Rebuild both heaps from live quotes only"""
+        store = self._book.store
+        live = [(exchange_id, self._base_slot + exchange_id) for exchange_id in self.exchange_ids]
+        live = [(exchange_id, slot) for exchange_id, slot in live if store.version[slot]]
+        self._min_heap = [(store.buy_price(slot), store.version[slot], exchange_id) for exchange_id, slot in live]
+        self._max_heap = [(-store.sell_price(slot), store.version[slot], exchange_id) for exchange_id, slot in live]
+        heapify(self._min_heap)
+        heapify(self._max_heap)
+
+    def __len__(self) -> int:
+        return len(self.exchange_ids)
+
+
+class PriceBook:
+    """Best buy/sell index over the quotes of a PriceStore, per symbol ID"""
+
+    def __init__(self, store: Optional[PriceStore] = None, default_max_age: float = DEFAULT_MAX_QUOTE_AGE,
+                 max_age_by_exchange: Optional[Dict[str, float]] = None):
+        self.store = store if store is not None else PriceStore()
+        self._quotes: List[Optional[SymbolQuotes]] = []  # symbol_id -> SymbolQuotes
+        self.default_max_age = default_max_age
+        self._max_age_by_exchange: Dict[str, float] = dict(max_age_by_exchange or {})
+        self.stale_skipped: Dict[str, int] = defaultdict(int)  # exchange -> quotes evicted as stale
+
+    def max_age(self, exchange: str) -> float:
+        """Max quote age in seconds for an exchange"""
+        return self._max_age_by_exchange.get(exchange, self.default_max_age)
+
+    def set_max_age(self, exchange: str, max_age: float):
+        """Override the max quote age for one exchange"""
+        self._max_age_by_exchange[exchange] = max_age
+
+    def stale_counters(self) -> Dict[str, int]:
+        """How many quotes were skipped as stale, per exchange"""
+        return dict(self.stale_skipped)
+
+    def update(self, exchange_id: int, symbol_id: int) -> SymbolQuotes:
+        """Index a quote just written to the store and return all quotes for its symbol"""
+        quotes_by_symbol = self._quotes
+        if symbol_id >= len(quotes_by_symbol):
+            quotes_by_symbol.extend([None] * (symbol_id + 1 - len(quotes_by_symbol)))
+        quotes = quotes_by_symbol[symbol_id]
+        if quotes is None:
+            quotes = quotes_by_symbol[symbol_id] = SymbolQuotes(self, symbol_id)
+        quotes.update(exchange_id)
+        return quotes
+
+    def get_quotes(self, symbol_id: int) -> Optional[SymbolQuotes]:
+        """Get the quote set of a symbol"""
+        if symbol_id < len(self._quotes):
+            return self._quotes[symbol_id]
+        return None
+
+    def get(self, symbol: str) -> Dict[str, TokenPrice]:
+        """Get quotes for a symbol keyed by exchange"""
+        symbol_id = self.store.find_symbol_id(symbol)
+        quotes = self.get_quotes(symbol_id) if symbol_id is not None else None
+        if quotes is None:
+            return {}
+        result = {}
+        for exchange_id in quotes.exchange_ids:
+            price_data = self.store.get(exchange_id, symbol_id)
+            if price_data is not None:
+                result[price_data.exchange] = price_data
+        return result
+
+    def get_price(self, exchange: str, symbol: str) -> Optional[TokenPrice]:
+        return self.get(symbol).get(exchange)
+
+    def symbols(self) -> List[str]:
+        return [self.store.symbols[symbol_id] for symbol_id, quotes in enumerate(self._quotes) if quotes]
+
+    def __len__(self) -> int:
+        return sum(len(quotes) for quotes in self._quotes if quotes)
@@ -0,0 +1,130 @@
+from array import array
+from typing import Dict, List, Optional, Iterator, Mapping
+
+from src.entities.entities_spread import TokenPrice
+
+# Column layout: one row of EXCHANGE_SLOTS cells per symbol, slot = symbol_id * EXCHANGE_SLOTS + exchange_id
+EXCHANGE_SLOTS = 16
+DEFAULT_SYMBOL_CAPACITY = 1024
+
+
+class PriceStore:
+    """Columnar store of the latest quote per (exchange, symbol).
+
+    Exchange names and canonical symbols are interned to small integer IDs; quotes live
+    in preallocated `array` columns and adapters overwrite their cells in place, so a
+    tick allocates no objects. A cell with version 0 holds no quote; bid/ask of 0.0
+    mean the feed has no book quotes.
+    """
+
+    def __init__(self, symbol_capacity: int = DEFAULT_SYMBOL_CAPACITY):
+        self._exchange_ids: Dict[str, int] = {}
+        self.exchange_names: List[str] = []
+        self._symbol_ids: Dict[str, int] = {}
+        self.symbols: List[str] = []
+
+        self._capacity = 0
+        self._version = 0
+        self.price = array('d')
+        self.bid = array('d')
+        self.ask = array('d')
+        self.timestamp = array('d')  # Exchange event time
+        self.received_at = array('d')  # Local receive time
+        self.version = array('Q')  # Write counter of the cell, 0 - empty
+        self._grow(symbol_capacity)
+
+    def _grow(self, symbol_capacity: int):
+        cells = (symbol_capacity - self._capacity) * EXCHANGE_SLOTS
+        zeros = bytes(8 * cells)
+        for column in (self.price, self.bid, self.ask, self.timestamp, self.received_at, self.version):
+            column.frombytes(zeros)
+        self._capacity = symbol_capacity
+
+    def exchange_id(self, exchange: str) -> int:
+        """Intern an exchange name"""
+        exchange_id = self._exchange_ids.get(exchange)
+        if exchange_id is None:
+            exchange_id = len(self.exchange_names)
+            if exchange_id == EXCHANGE_SLOTS:
+                raise ValueError(f"Price store supports at most {EXCHANGE_SLOTS} exchanges")
+            self._exchange_ids[exchange] = exchange_id
+            self.exchange_names.append(exchange)
+        return exchange_id
+
+    def symbol_id(self, symbol: str) -> int:
+        """Intern a canonical symbol"""
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = len(self.symbols)
+            if symbol_id == self._capacity:
+                self._grow(self._capacity * 2)
+            self._symbol_ids[symbol] = symbol_id
+            self.symbols.append(symbol)
+        return symbol_id
+
+    def find_symbol_id(self, symbol: str) -> Optional[int]:
+        """ID of an already interned symbol"""
+        return self._symbol_ids.get(symbol)
+
+    def write(self, exchange_id: int, symbol_id: int, price: float, timestamp: float,
+              bid: Optional[float], ask: Optional[float], received_at: float) -> int:
+        """Overwrite the quote cell in place and return its slot"""
+        slot = symbol_id * EXCHANGE_SLOTS + exchange_id
+        self.price[slot] = price
+        self.bid[slot] = bid or 0.0
+        self.ask[slot] = ask or 0.0
+        self.timestamp[slot] = timestamp
+        self.received_at[slot] = received_at
+        self._version += 1
+        self.version[slot] = self._version
+        return slot
+
+    def clear(self, slot: int):
+        """Drop the quote of a cell"""
+        self.version[slot] = 0
+
+    def buy_price(self, slot: int) -> float:
+        """Executable price to buy at: best ask, falling back to the last price"""
+        return self.ask[slot] or self.price[slot]
+
+    def sell_price(self, slot: int) -> float:
+        """Executable price to sell at: best bid, falling back to the last price"""
+        return self.bid[slot] or self.price[slot]
+
+    def get(self, exchange_id: int, symbol_id: int) -> Optional[TokenPrice]:
+        """Materialize a quote as TokenPrice (for logging and reporting, not the hot path)"""
+        slot = symbol_id * EXCHANGE_SLOTS + exchange_id
+        if not self.version[slot]:
+            return None
+        return TokenPrice(
+            self.exchange_names[exchange_id], self.symbols[symbol_id], self.price[slot],
+            self.timestamp[slot], self.bid[slot] or None, self.ask[slot] or None, self.received_at[slot]
+        )
+
+    def exchange_prices(self, exchange_id: int) -> "ExchangePricesView":
+        return ExchangePricesView(self, exchange_id)
+
+
+class ExchangePricesView(Mapping):
+    """Read-only symbol -> last price mapping of one exchange, backed by the store columns"""
+
+    def __init__(self, store: PriceStore, exchange_id: int):
+        self._store = store
+        self._exchange_id = exchange_id
+
+    def __getitem__(self, symbol: str) -> float:
+        symbol_id = self._store.find_symbol_id(symbol)
+        if symbol_id is not None:
+            slot = symbol_id * EXCHANGE_SLOTS + self._exchange_id
+            if self._store.version[slot]:
+                return self._store.price[slot]
+        raise KeyError(symbol)
+
+    def __iter__(self) -> Iterator[str]:
+        store = self._store
+        for symbol_id, symbol in enumerate(store.symbols):
+            if store.version[symbol_id * EXCHANGE_SLOTS + self._exchange_id]:
+                yield symbol
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
@@ -0,0 +1,165 @@
+import asyncio
+import cProfile
+import io
+import pstats
+import signal
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Optional
+
+from aiohttp import web
+
+from src.utils.logger import logger
+
+
+class RuntimeProfiler:
+    """On-demand CPU profile and allocation snapshot of the running process.
+
+    Each capture runs for a bounded window and then switches itself off, writing its
+    report to `reports_dir`: a cProfile window produces a .prof file (for snakeviz/pstats)
+    and a text summary of the top functions; a tracemalloc window produces the top
+    allocation sites, the growth over the window and `context_report()` - sizes of the
+    service's caches and the live asyncio tasks. Captures are started by SIGUSR1/SIGUSR2
+    (where the platform has them) or over the local control endpoint.
+    """
+
+    def __init__(self, reports_dir: str = "reports", cpu_window: float = 30.0, memory_window: float = 60.0,
+                 top: int = 40, context_report: Optional[Callable[[], str]] = None):
+        self.reports_dir = Path(reports_dir)
+        self.cpu_window = cpu_window
+        self.memory_window = memory_window
+        self.top = top
+        self.context_report = context_report
+
+        self._cpu_profile: Optional[cProfile.Profile] = None
+        self._cpu_timer: Optional[asyncio.TimerHandle] = None
+        self._memory_baseline: Optional[tracemalloc.Snapshot] = None
+        self._started_tracing = False  # tracemalloc был включён нами, а не PYTHONTRACEMALLOC
+        self._memory_timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def cpu_running(self) -> bool:
+        return self._cpu_profile is not None
+
+    @property
+    def memory_running(self) -> bool:
+        return self._memory_baseline is not None
+
+    def _report_path(self, kind: str, suffix: str) -> Path:
+        self.reports_dir.mkdir(parents=True, exist_ok=True)
+        return self.reports_dir / f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}{suffix}"
+
+    def start_cpu_profile(self, seconds: Optional[float] = None) -> bool:
+        """Profile the event loop thread for `seconds` (default cpu_window); False if a window is already open"""
+        if self.cpu_running:
+            return False
+        seconds = seconds or self.cpu_window
+        self._cpu_profile = cProfile.Profile()
+        self._cpu_profile.enable()
+        self._cpu_timer = asyncio.get_running_loop().call_later(seconds, self.stop_cpu_profile)
+        logger.info(f"CPU profile started for {seconds:g}s")
+        return True
+
+    def stop_cpu_profile(self) -> Optional[Path]:
+        """Close the CPU window now and write its reports"""
+        profile = self._cpu_profile
+        if profile is None:
+            return None
+        profile.disable()
+        self._cpu_profile = None
+        if self._cpu_timer is not None:
+            self._cpu_timer.cancel()
+            self._cpu_timer = None
+
+        path = self._report_path("cpu", ".prof")
+        profile.dump_stats(str(path))
+        summary = io.StringIO()
+        pstats.Stats(profile, stream=summary).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+        path.with_suffix(".txt").write_text(summary.getvalue())
+        logger.info(f"CPU profile written to {path}")
+        return path
+
+    def start_memory_trace(self, seconds: Optional[float] = None, frames: int = 5) -> bool:
+        """Trace allocations for `seconds` (default memory_window); False if a window is already open"""
+        if self.memory_running:
+            return False
+        seconds = seconds or self.memory_window
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            self._started_tracing = True
+        self._memory_baseline = tracemalloc.take_snapshot()
+        self._memory_timer = asyncio.get_running_loop().call_later(seconds, self.stop_memory_trace)
+        logger.info(f"Memory trace started for {seconds:g}s")
+        return True
+
+    def stop_memory_trace(self) -> Optional[Path]:
+        """Close the memory window now and write the allocation report"""
+        baseline = self._memory_baseline
+        if baseline is None:
+            return None
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        self._memory_baseline = None
+        if self._memory_timer is not None:
+            self._memory_timer.cancel()
+            self._memory_timer = None
+
+        lines = [f"Traced memory: current {current / 2 ** 20:.1f} MiB, peak {peak / 2 ** 20:.1f} MiB", "",
+                 f"Top {self.top} allocation sites:"]
+        lines += [str(stat) for stat in snapshot.statistics("lineno")[:self.top]]
+        lines += ["", f"Top {self.top} growth over the window:"]
+        lines += [str(stat) for stat in snapshot.compare_to(baseline, "lineno")[:self.top]]
+        if self.context_report is not None:
+            lines += ["", self.context_report()]
+
+        path = self._report_path("memory", ".txt")
+        path.write_text("\n".join(lines) + "\n")
+        logger.info(f"Memory report written to {path}")
+        return path
+
+    def stop(self):
+        """Close any open window, writing its report"""
+        self.stop_cpu_profile()
+        self.stop_memory_trace()
+
+    def install_signal_handlers(self) -> bool:
+        """SIGUSR1 - CPU profile window, SIGUSR2 - memory trace window (not available on Windows)"""
+        if not hasattr(signal, "SIGUSR1"):
+            logger.warning("Profiler signals are not supported on this platform, use the control endpoint")
+            return False
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGUSR1, self.start_cpu_profile)
+        loop.add_signal_handler(signal.SIGUSR2, self.start_memory_trace)
+        return True
+
+    def add_routes(self, app: web.Application):
+        """POST /debug/profile?seconds=N and /debug/memory?seconds=N on a local aiohttp app"""
+        app.router.add_post("/debug/profile", self._handle_profile)
+        app.router.add_post("/debug/memory", self._handle_memory)
+
+    @staticmethod
+    def _seconds(request: web.Request) -> Optional[float]:
+        seconds = request.query.get("seconds")
+        if not seconds:
+            return None
+        try:
+            value = float(seconds)
+        except ValueError:
+            raise web.HTTPBadRequest(text="seconds must be a number\n")
+        if value <= 0:
+            raise web.HTTPBadRequest(text="seconds must be positive\n")
+        return value
+
+    async def _handle_profile(self, request: web.Request) -> web.Response:
+        if not self.start_cpu_profile(self._seconds(request)):
+            return web.Response(status=409, text="CPU profile already running\n")
+        return web.Response(status=202, text=f"CPU profile started, report goes to {self.reports_dir}\n")
+
+    async def _handle_memory(self, request: web.Request) -> web.Response:
+        if not self.start_memory_trace(self._seconds(request)):
+            return web.Response(status=409, text="Memory trace already running\n")
+        return web.Response(status=202, text=f"Memory trace started, report goes to {self.reports_dir}\n")
@@ -0,0 +1,25 @@
+import asyncio
+import time
+
+
+class RateLimiter:
+    """Paces calls to at most `rate` per second, spacing them evenly"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        """Wait for the next free slot"""
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_at - now
+            if delay > 0:
+                await asyncio.sleep(delay)
+                now = time.monotonic()
+            self._next_at = max(now, self._next_at) + self.interval
+
+    def pause(self, seconds: float):
+        """Hold back every further call for `seconds` (e.g. after HTTP 429)"""
+        self._next_at = max(self._next_at, time.monotonic() + seconds)
@@ -0,0 +1,66 @@
+from typing import Dict, Optional
+
+from src.utils.histogram import HdrHistogram
+
+# Stages of the message path, in order
+STAGES = ("recv", "decode", "process", "normalize", "fanout", "evaluate")
+
+
+class ExchangeStages:
+    """Stage histograms of one exchange, bound once by the code that records them"""
+
+    __slots__ = STAGES
+
+    def __init__(self, max_value: float):
+        for stage in STAGES:
+            setattr(self, stage, HdrHistogram(max_value))
+
+
+class StageTimer:
+    """Sampled per-stage timing of the message path, aggregated per exchange.
+
+    One frame (and one spread evaluation) out of every `sample_every` is timed with
+    perf_counter; the rest cost a countdown decrement. Stages:
+    recv - waiting in websocket.recv (includes idle time between frames),
+    decode - JSON/schema decoding, process - the adapter's _process_message (includes
+    normalize and fanout), normalize - raw symbol resolution and price scaling,
+    fanout - price update callbacks, evaluate - the spread check of a symbol, attributed
+    to every exchange whose fresh quote it evaluated (the matrix engine's scan covers all
+    exchanges at once and is recorded under "MATRIX"). sample_every=0 disables timing.
+    """
+
+    def __init__(self, sample_every: int = 100, max_value: float = 60.0):
+        if sample_every < 0:
+            raise ValueError("sample_every must not be negative")
+        self.sample_every = sample_every
+        self.max_value = max_value
+        self._stages: Dict[str, ExchangeStages] = {}
+
+    def stages(self, exchange: str) -> ExchangeStages:
+        """Stage histograms of an exchange (created on first use)"""
+        stages = self._stages.get(exchange)
+        if stages is None:
+            stages = self._stages[exchange] = ExchangeStages(self.max_value)
+        return stages
+
+    def reset(self):
+        for stages in self._stages.values():
+            for stage in STAGES:
+                getattr(stages, stage).reset()
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, Optional[float]]]]:
+        """Exchange -> stage -> histogram summary, seconds"""
+        return {exchange: {stage: getattr(stages, stage).summary() for stage in STAGES}
+                for exchange, stages in self._stages.items()}
+
+    def report(self) -> str:
+        """Human-readable table: samples, mean, p50, p99 and max per exchange and stage, microseconds"""
+        lines = [f"{'exchange':<10} {'stage':<10} {'samples':>8} {'mean':>10} {'p50':>10} {'p99':>10} {'max':>10}"]
+        for exchange, stages in sorted(self.snapshot().items()):
+            for stage, summary in stages.items():
+                if not summary["count"]:
+                    continue
+                values = (summary[key] * 1e6 for key in ("mean", "p50", "p99", "max"))
+                lines.append(f"{exchange:<10} {stage:<10} {summary['count']:>8} "
+                             + " ".join(f"{value:>10.1f}" for value in values))
+        return "\n".join(lines)
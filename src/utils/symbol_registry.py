@@ -0,0 +1,101 @@
+import re
+from typing import Dict, Iterable, Tuple
+
+from src.entities.entities_symbols import ContractInfo
+
+# Quote currencies recognized at the end of symbols without a separator, longest first
+KNOWN_QUOTES = ("USDT", "USDC", "BUSD", "USD")
+# Suffixes of contract names that are not part of the pair (OKX swaps, Bitget v1 product types)
+CONTRACT_SUFFIXES = ("-SWAP", "_UMCBL", "_DMCBL", "_CMCBL")
+# "1000PEPE", "10000LADYS", "1MBABYDOGE": how venues that list multiplied contracts spell the multiple
+# of the base coin. The prefix alone proves nothing (some coins are named like this), so it is only
+# applied to contracts whose metadata reports a multiplier
+MULTIPLIER_PREFIX = re.compile(r"^(10{2,}|1M)(?=[A-Z])")
+
+
+class SymbolRegistry:
+    """Maps raw exchange symbols to canonical symbols with a price multiplier.
+
+    Built once from ExchangeFetchSymbols contract metadata; lookups on the hot path are
+    a plain dict hit. Symbols without metadata are canonicalized by rules on first
+    sight and memoized, always with multiplier 1. Prices are divided by the multiplier
+    the contract metadata reports, so "1000PEPEUSDT" on one venue and "PEPE_USDT" on
+    another both land on "PEPEUSDT" per single coin.
+    """
+
+    def __init__(self):
+        self._symbols: Dict[str, Dict[str, Tuple[str, float]]] = {}  # exchange -> raw -> (canonical, multiplier)
+        self.contract_sizes: Dict[Tuple[str, str], float] = {}  # (exchange, canonical) -> base units per contract
+
+    def for_exchange(self, exchange: str) -> Dict[str, Tuple[str, float]]:
+        """Live raw -> (canonical, multiplier) mapping of one exchange"""
+        exchange = exchange.lower()
+        symbols = self._symbols.get(exchange)
+        if symbols is None:
+            symbols = self._symbols[exchange] = {}
+        return symbols
+
+    def register_contract(self, contract: ContractInfo):
+        base = contract.base.upper()
+        if contract.multiplier != 1.0:
+            base = self.strip_multiplier(base, contract.multiplier)
+        canonical = f"{base}{contract.quote.upper()}"
+        self.for_exchange(contract.exchange)[contract.ws_symbol.upper()] = (canonical, contract.multiplier)
+        self.contract_sizes[(contract.exchange.lower(), canonical)] = contract.contract_size
+
+    def register_contracts(self, contracts: Iterable[ContractInfo]):
+        for contract in contracts:
+            self.register_contract(contract)
+
+    def resolve(self, exchange: str, raw_symbol: str) -> Tuple[str, float]:
+        """Canonical symbol and price multiplier of a raw exchange symbol"""
+        symbols = self.for_exchange(exchange)
+        resolved = symbols.get(raw_symbol)
+        if resolved is None:
+            resolved = symbols[raw_symbol] = self.canonicalize(raw_symbol)
+        return resolved
+
+    @staticmethod
+    def prefix_multiplier(base: str) -> float:
+        """Multiple spelled by a "1000"/"1M" prefix of the base (1.0 without one).
+
+        Only for fetchers of venues that list multiplied contracts under such names.
+        """
+        match = MULTIPLIER_PREFIX.match(base.upper())
+        if not match:
+            return 1.0
+        prefix = match.group(1)
+        return 1_000_000.0 if prefix == "1M" else float(prefix)
+
+    @classmethod
+    def strip_multiplier(cls, base: str, multiplier: float) -> str:
+        """Base coin without the prefix that spells `multiplier` (unchanged if it does not spell it)"""
+        match = MULTIPLIER_PREFIX.match(base)
+        if not match or cls.prefix_multiplier(base) != multiplier:
+            return base
+        return base[len(match.group(1)):]
+
+    @staticmethod
+    def split_pair(raw_symbol: str) -> Tuple[str, str]:
+        """Split a raw symbol ("BTC_USDT", "BTC-USDT-SWAP", "BTCUSDT") into base and quote"""
+        symbol = raw_symbol.upper()
+        for suffix in CONTRACT_SUFFIXES:
+            if symbol.endswith(suffix):
+                symbol = symbol[:-len(suffix)]
+                break
+
+        for separator in ("_", "-"):
+            if separator in symbol:
+                base, _, quote = symbol.partition(separator)
+                return base, quote.replace(separator, "")
+
+        for quote in KNOWN_QUOTES:
+            if symbol.endswith(quote) and len(symbol) > len(quote):
+                return symbol[:-len(quote)], quote
+        return symbol, ""
+
+    @classmethod
+    def canonicalize(cls, raw_symbol: str) -> Tuple[str, float]:
+        """Rule-based canonical symbol for symbols without contract metadata (multiplier 1)"""
+        base, quote = cls.split_pair(raw_symbol)
+        return f"{base}{quote}", 1.0
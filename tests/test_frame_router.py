@@ -0,0 +1,24 @@
+from src.exchanges.gate import GateExchange
+from src.exchanges.ws.frame_router import FRAME_ACK, FRAME_DATA, FRAME_PONG
+
+# Current Gate futures frames: conn_id and trace_id come before channel and event
+GATE_ACK = ('{"time":1729150000,"time_ms":1729150000123,"conn_id":"5e74253e9c793974",'
+            '"trace_id":"d8ee37cd14347e4ed298d44e69aedaa7","channel":"futures.tickers","event":"subscribe",'
+            '"payload":["BTC_USDT"],"result":{"status":"success"},"id":3}')
+GATE_TICKER = ('{"time":1729150001,"time_ms":1729150001456,"channel":"futures.tickers","event":"update",'
+               '"result":[{"contract":"BTC_USDT","last":"67000.1"}]}')
+GATE_PONG = ('{"time":1729150002,"time_ms":1729150002789,"conn_id":"5e74253e9c793974",'
+             '"trace_id":"d8ee37cd14347e4ed298d44e69aedaa7","channel":"futures.pong","event":"","result":null}')
+
+
+def test_gate_ack_with_conn_and_trace_id_is_an_ack():
+    router = GateExchange().frame_router
+    assert GATE_ACK.index('"event":"subscribe"') > 128
+    assert router.classify(GATE_ACK) == FRAME_ACK
+    assert router.classify(GATE_ACK.encode()) == FRAME_ACK
+
+
+def test_gate_ticker_and_pong_frames():
+    router = GateExchange().frame_router
+    assert router.classify(GATE_TICKER) == FRAME_DATA
+    assert router.classify(GATE_PONG) == FRAME_PONG